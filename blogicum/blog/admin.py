@@ -1,9 +1,91 @@
+from collections import defaultdict
+
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
 
+from . import search
 from .models import Post, Category, Location, Comment
 
 
-class PostAdmin(admin.ModelAdmin):
+INLINE_POSTS_PER_PAGE = 20
+
+
+class SharedLabelsAutocompleteSelect(AutocompleteSelect):
+    """Autocomplete, подписи выбранных значений которого общие на запрос.
+
+    Стандартный виджет делает по запросу к базе на каждую строку списка;
+    здесь подписи берутся из словаря, заполненного строками самого списка.
+    """
+
+    def __init__(self, field, admin_site, labels, **kwargs):
+        super().__init__(field, admin_site, **kwargs)
+        self.labels = labels
+
+    def optgroups(self, name, value, attr=None):
+        default = (None, [], 0)
+        selected_choices = {
+            str(choice) for choice in value
+            if str(choice) not in self.choices.field.empty_values
+        }
+        if not self.is_required and not self.allow_multiple_selected:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        missing = selected_choices - self.labels.keys()
+        if missing:
+            for obj in self.choices.queryset.using(self.db).filter(
+                    pk__in=missing):
+                self.labels[str(obj.pk)] = (
+                    self.choices.field.label_from_instance(obj)
+                )
+        for option_value in sorted(selected_choices & self.labels.keys()):
+            default[1].append(self.create_option(
+                name, option_value, self.labels[option_value], True,
+                len(default[1]),
+            ))
+        return [default]
+
+
+class SharedChoicesAdminMixin:
+    """Поля autocomplete_fields на странице списка без запроса на строку."""
+
+    def get_shared_labels(self, request):
+        if not hasattr(request, '_admin_choice_labels'):
+            request._admin_choice_labels = defaultdict(dict)
+        return request._admin_choice_labels
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs['widget'] = SharedLabelsAutocompleteSelect(
+                db_field,
+                self.admin_site,
+                labels=self.get_shared_labels(request)[db_field.name],
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset_class = super().get_changelist_formset(request, **kwargs)
+        labels = self.get_shared_labels(request)
+        fields = self.get_autocomplete_fields(request)
+
+        class SharedLabelsFormSet(formset_class):
+            def __init__(self, *args, queryset=None, **kwargs):
+                # Берём только связанные объекты, уже загруженные через
+                # list_select_related, чтобы не добавить запросов.
+                for obj in queryset if queryset is not None else ():
+                    for field in fields:
+                        if not obj._meta.get_field(field).is_cached(obj):
+                            continue
+                        related = getattr(obj, field)
+                        if related is not None:
+                            labels[field][str(related.pk)] = str(related)
+                super().__init__(*args, queryset=queryset, **kwargs)
+
+        return SharedLabelsFormSet
+
+
+class PostAdmin(SharedChoicesAdminMixin, admin.ModelAdmin):
     list_display = [
         'title',
         'text',
@@ -12,6 +94,7 @@ class PostAdmin(admin.ModelAdmin):
         'location',
         'category',
         'is_published',
+        'is_visible',
         'created_at',
         'image',
     ]
@@ -24,9 +107,13 @@ class PostAdmin(admin.ModelAdmin):
         'category',
         'is_published',
     )
+    # Поле нужно админке, чтобы показать строку поиска; сам поиск идёт
+    # по полнотекстовому индексу в get_search_results.
     search_fields = ('title',)
     list_filter = ('category',)
     list_per_page = 3
+    list_select_related = ('author', 'location', 'category')
+    autocomplete_fields = ('author', 'location', 'category')
 
     fields = ['title', ('text', 'pub_date'), (
         'author', 'location',
@@ -37,10 +124,82 @@ class PostAdmin(admin.ModelAdmin):
             'all': ('css/custom_changelists.css',)
         }
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        post_ids = search.get_backend().post_ids(search_term)
+        return queryset.filter(pk__in=post_ids), False
+
+
+class PostInline(admin.TabularInline):
+    """Публикации категории или места постранично и только для чтения.
+
+    Загружается одна страница строк и счётчик, поэтому страница изменения
+    категории не зависит от числа её публикаций. Менять здесь можно лишь
+    флаг публикации, остальное — по ссылке на пост.
+    """
 
-class PostInline(admin.StackedInline):
     model = Post
-    extra = 1
+    extra = 0
+    can_delete = False
+    show_change_link = True
+    fields = ('title', 'pub_date', 'author', 'is_published')
+    readonly_fields = ('title', 'pub_date', 'author')
+    ordering = ('-pub_date', '-pk')
+    template = 'admin/blog/paginated_tabular.html'
+    per_page = INLINE_POSTS_PER_PAGE
+    page_param = 'posts_page'
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).defer('text')
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset_class = super().get_formset(request, obj, **kwargs)
+        page_number = request.GET.get(self.page_param)
+        per_page = self.per_page
+
+        class PaginatedFormSet(formset_class):
+            page_param = self.page_param
+
+            def get_queryset(self):
+                if not hasattr(self, 'page'):
+                    queryset = super().get_queryset()
+                    self.page = Paginator(queryset, per_page).get_page(
+                        page_number
+                    )
+                    if self.is_bound:
+                        # Между показом и сохранением страницу могли сдвинуть
+                        # новые посты: сохраняем те строки, что были в форме.
+                        self.rows = queryset.filter(
+                            pk__in=self.submitted_pks()
+                        )
+                    else:
+                        self.rows = self.page.object_list
+                    # Вычисляем строки сразу: формы берут их по индексу.
+                    len(self.rows)
+                return self.rows
+
+            def submitted_pks(self):
+                pk_field = self.model._meta.pk
+                pks = []
+                for index in range(per_page):
+                    value = self.data.get(
+                        f'{self.add_prefix(index)}-{pk_field.name}'
+                    )
+                    try:
+                        pks.append(pk_field.to_python(value))
+                    except ValidationError:
+                        continue
+                return [pk for pk in pks if pk is not None]
+
+        return PaginatedFormSet
 
 
 class CategoryAdmin(admin.ModelAdmin):
@@ -83,7 +242,7 @@ class LocationAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SharedChoicesAdminMixin, admin.ModelAdmin):
     list_display = [
         'text',
         'author',
@@ -92,9 +251,11 @@ class CommentAdmin(admin.ModelAdmin):
     ]
 
     list_display_links = None
-    search_fields = ('author',)
+    search_fields = ('author__username',)
     list_filter = ('created_at',)
     list_per_page = 3
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author',)
 
     fields = [
         'text', ('author', 'created_at'),
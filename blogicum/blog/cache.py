@@ -0,0 +1,179 @@
+"""Кэш страниц блога для анонимных посетителей.
+
+Ключ страницы включает версии её тегов (лента, пост, категория, автор).
+Коммит записи в модель увеличивает версии затронутых тегов, и старые записи
+просто перестают находиться, поэтому кэш не нужно чистить по таймауту.
+Карточки постов кэшируются отдельно под хэшем всего, что они выводят.
+
+Вместе с версией тег хранит время последнего сброса — Last-Modified
+страниц. Время берётся из общих строго растущих часов, поэтому два
+изменения в одну секунду не получают одинакового Last-Modified.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import images
+
+
+GLOBAL_TAG = 'global'
+FEED_TAG = 'feed'
+
+
+def get_cache():
+    return caches[settings.BLOG_PAGE_CACHE_ALIAS]
+
+
+def post_tag(pk):
+    return f'post:{pk}'
+
+
+def category_tag(slug):
+    return f'category:{slug}'
+
+
+def user_tag(username):
+    return f'user:{username}'
+
+
+CLOCK_KEY = 'blog:clock'
+
+
+def _version_key(tag):
+    return f'blog:tag:{tag}'
+
+
+def _changed_key(tag):
+    return f'blog:tag-changed:{tag}'
+
+
+def _tick():
+    """Секунды, каждый вызов больше предыдущего хотя бы на одну."""
+    cache = get_cache()
+    now = int(time.time())
+    cache.add(CLOCK_KEY, now, timeout=None)
+    try:
+        tick = cache.incr(CLOCK_KEY)
+    except ValueError:
+        # Часы вытеснили между add и incr.
+        cache.add(CLOCK_KEY, now, timeout=None)
+        return now
+    if tick < now:
+        # Догоняем настоящее время; одновременные вызовы всё равно
+        # получат разные значения.
+        tick = cache.incr(CLOCK_KEY, now - tick)
+    return tick
+
+
+def get_tag_versions(tags):
+    """Возвращает версии тегов одним запросом к кэшу."""
+    cache = get_cache()
+    keys = [_version_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Вытесненная версия начинается с текущего времени, чтобы
+            # не совпасть ни с одной версией, под которой уже лежат страницы.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_last_changed(tags):
+    """Время (секунды) последнего сброса любого из тегов."""
+    cache = get_cache()
+    keys = [_changed_key(tag) for tag in tags]
+    changed = cache.get_many(keys)
+    for key in keys:
+        if key not in changed:
+            # Время неизвестно: считаем, что тег сбросили только что.
+            cache.add(key, _tick(), timeout=None)
+            changed[key] = cache.get(key)
+    return max(changed.values())
+
+
+def invalidate(*tags):
+    cache = get_cache()
+    tags = set(filter(None, tags))
+    # Время пишется до версии: страница, прочитанная между ними, получит
+    # более позднее время под старой версией, а не наоборот.
+    changed = _tick()
+    cache.set_many(
+        {_changed_key(tag): changed for tag in tags}, timeout=None
+    )
+    for tag in tags:
+        key = _version_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_on_commit(*tags):
+    """Сбрасывает теги после коммита текущей транзакции.
+
+    До коммита чтение видит старые строки, и страница, собранная из них,
+    легла бы в кэш уже под новой версией тега.
+    """
+    transaction.on_commit(lambda: invalidate(*tags))
+
+
+def page_cache_key(request, tags):
+    tags = [*tags, GLOBAL_TAG]
+    versions = get_tag_versions(tags)
+    signature = '|'.join(
+        [request.get_full_path(), *map(str, tags), *map(str, versions)]
+    )
+    digest = hashlib.md5(signature.encode()).hexdigest()
+    return f'blog:page:{digest}'
+
+
+def post_card_signature(post):
+    """Всё, что выводит карточка, включая связанные строки.
+
+    updated_at не меняется ни при update() по набору постов, ни при
+    правке автора, места или категории, а srcset зависит от того, какие
+    варианты картинки уже готовы.
+    """
+    category, location = post.category, post.location
+    return (
+        post.updated_at, post.title, post.excerpt, post.pub_date,
+        post.is_published, post.image.name, post.comment_count,
+        post.author.username,
+        category and (category.slug, category.title, category.is_published),
+        location and (location.name, location.is_published),
+        images.ready_variants(post.image.name) if post.image else (),
+    )
+
+
+def post_card_key(post, global_version):
+    digest = hashlib.md5(
+        repr(post_card_signature(post)).encode()
+    ).hexdigest()
+    return f'blog:card:{post.pk}:{digest}:{global_version}'
+
+
+def render_post_cards(posts):
+    """HTML карточек постов: готовые берутся из кэша одним get_many."""
+    posts = list(posts)
+    if not posts:
+        return []
+    cache = get_cache()
+    global_version, = get_tag_versions([GLOBAL_TAG])
+    keys = [post_card_key(post, global_version) for post in posts]
+    cached = cache.get_many(keys)
+    rendered = {}
+    for key, post in zip(keys, posts):
+        if key not in cached:
+            rendered[key] = render_to_string(
+                'includes/post_card.html', {'post': post}
+            )
+    if rendered:
+        cache.set_many(rendered, settings.BLOG_PAGE_CACHE_TIMEOUT)
+        cached.update(rendered)
+    return [mark_safe(cached[key]) for key in keys]
@@ -1,8 +1,12 @@
 from django import forms
-from django.contrib.auth.forms import UserChangeForm, UserCreationForm
+from django.contrib.auth.forms import (
+    PasswordResetForm, UserChangeForm, UserCreationForm)
 from django.contrib.auth import get_user_model
+from django.template import loader
 from django.utils import timezone
 
+from core import jobs, tasks
+
 from .models import Comment, Post
 
 
@@ -26,6 +30,29 @@ class UserUdateForm(UserChangeForm):
         fields = ('username', 'first_name', 'last_name', 'email',)
 
 
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо сброса пароля отправляет воркер, а не запрос."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        # Шаблоны рендерим здесь: в контексте объекты, не пишущиеся в JSON.
+        subject = ''.join(
+            loader.render_to_string(subject_template_name, context)
+            .splitlines()
+        )
+        body = loader.render_to_string(email_template_name, context)
+        html_body = None
+        if html_email_template_name is not None:
+            html_body = loader.render_to_string(
+                html_email_template_name, context
+            )
+        jobs.enqueue(
+            tasks.send_email, subject, body, from_email, [to_email],
+            html_body=html_body,
+        )
+
+
 class CommentForm(forms.ModelForm):
 
     class Meta:
@@ -0,0 +1,134 @@
+"""Уменьшенные варианты картинок постов для srcset.
+
+Для каждой картинки строятся варианты шириной THUMBNAIL_WIDTHS в WebP
+и JPEG. Они лежат в отдельном хранилище (THUMBNAIL_ROOT) по пути
+<имя оригинала>/<ширина>.<формат>. Имя оригинала при замене файла
+меняется, поэтому варианты неизменяемы и их можно кэшировать навсегда.
+"""
+import os
+import tempfile
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+THUMBNAIL_WIDTHS = (320, 640, 960)
+# Формат в URL: (формат Pillow, MIME-тип, параметры сохранения).
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True,
+                                    'progressive': True}),
+}
+
+
+class ThumbnailStorage(FileSystemStorage):
+    """Каталог и URL вариантов, читаемые из настроек при каждом обращении."""
+
+    @property
+    def base_location(self):
+        return settings.THUMBNAIL_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        return settings.THUMBNAIL_URL
+
+    def save_atomic(self, name, content):
+        """Записывает файл через переименование, без суффиксов Django.
+
+        Два запроса, одновременно создающие один вариант, просто
+        перезапишут его одинаковым содержимым.
+        """
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+
+thumbnail_storage = ThumbnailStorage()
+
+
+def variant_name(name, width, fmt):
+    return str(PurePosixPath(name) / f'{width}.{fmt}')
+
+
+def render_variant(image, width, fmt):
+    pil_format, _, options = THUMBNAIL_FORMATS[fmt]
+    variant = image.copy()
+    # Не увеличиваем: маленький оригинал остаётся своего размера.
+    variant.thumbnail((width, width * 10), Image.LANCZOS)
+    if pil_format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', variant.size, 'white')
+        background.paste(variant, mask=variant.convert('RGBA'))
+        variant = background
+    buffer = BytesIO()
+    variant.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def open_original(name):
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    # Фото с телефона повёрнуты через EXIF, а варианты его не сохраняют.
+    return ImageOps.exif_transpose(image)
+
+
+def generate_variant(name, width, fmt, image=None):
+    if image is None:
+        image = open_original(name)
+    thumbnail_storage.save_atomic(
+        variant_name(name, width, fmt), render_variant(image, width, fmt)
+    )
+
+
+def generate_variants(name):
+    """Все варианты картинки; оригинал открывается один раз."""
+    image = open_original(name)
+    for width in THUMBNAIL_WIDTHS:
+        for fmt in THUMBNAIL_FORMATS:
+            generate_variant(name, width, fmt, image)
+
+
+def delete_variants(name):
+    if not thumbnail_storage.exists(name):
+        return
+    _, files = thumbnail_storage.listdir(name)
+    for file_name in files:
+        thumbnail_storage.delete(str(PurePosixPath(name) / file_name))
+    # Пустой каталог FileSystemStorage.delete удаляет через rmdir.
+    thumbnail_storage.delete(name)
+
+
+def ready_variants(name):
+    """Имена готовых вариантов картинки, одним чтением каталога."""
+    try:
+        return sorted(thumbnail_storage.listdir(name)[1])
+    except FileNotFoundError:
+        return []
+
+
+def variant_url(name, width, fmt):
+    """URL готового варианта или представления, создающего его."""
+    variant = variant_name(name, width, fmt)
+    if thumbnail_storage.exists(variant):
+        return thumbnail_storage.url(variant)
+    return reverse('blog:thumbnail', kwargs={
+        'width': width, 'fmt': fmt, 'name': name,
+    })
+
+
+def srcset(name, fmt):
+    return ', '.join(
+        f'{variant_url(name, width, fmt)} {width}w'
+        for width in THUMBNAIL_WIDTHS
+    )
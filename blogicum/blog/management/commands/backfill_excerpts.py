@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import cache
+from blog.models import Post
+
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Заполняет анонсы постов, сохранённых до появления поля excerpt.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько постов обновлять за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--all', action='store_true', dest='rebuild',
+            help='Пересчитать анонсы всех постов, а не только пустые.'
+        )
+
+    def handle(self, *args, batch_size, rebuild, **options):
+        posts = Post.objects.only('pk', 'text').order_by('pk')
+        if not rebuild:
+            posts = posts.filter(excerpt='')
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                post.excerpt = Post.make_excerpt(post.text)
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ['excerpt'])
+            last_pk = batch[-1].pk
+            updated += len(batch)
+        # bulk_update не трогает updated_at, поэтому карточки сбрасываем
+        # через общую версию кэша.
+        cache.invalidate(cache.GLOBAL_TAG)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено анонсов: {updated}'
+        ))
@@ -0,0 +1,152 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+from blog.views import CategoryListView, PostListView, UserListView
+
+
+User = get_user_model()
+
+N_POSTS = 1_000_000
+N_USERS = 1000
+N_CATEGORIES = 50
+N_LOCATIONS = 100
+BATCH_SIZE = 10_000
+REPEAT = 5
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует данные и сравнивает планы и время горячих запросов '
+        'ленты без индексов и с индексами. Все изменения откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=N_POSTS)
+        parser.add_argument('--users', type=int, default=N_USERS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--repeat', type=int, default=REPEAT)
+
+    def handle(self, *args, **options):
+        if options['posts'] < 1 or options['users'] < 1:
+            raise CommandError('--posts и --users должны быть не меньше 1.')
+        with transaction.atomic():
+            self.generate(options['posts'], options['users'],
+                          options['batch_size'])
+            queries = self.hot_queries()
+            indexes = [
+                (model, index)
+                for model in (Post, Comment)
+                for index in model._meta.indexes
+            ]
+            # Без контекстного менеджера: SQLite не даёт войти в него
+            # внутри транзакции, а сами DROP/CREATE INDEX откатываются.
+            editor = connection.schema_editor(atomic=False)
+            for model, index in indexes:
+                editor.remove_index(model, index)
+            self.report('Без индексов', queries, options['repeat'])
+            for model, index in indexes:
+                editor.add_index(model, index)
+            self.report('С индексами', queries, options['repeat'])
+            transaction.set_rollback(True)
+
+    def generate(self, n_posts, n_users, batch_size):
+        self.stdout.write(f'Генерация {n_posts} постов...')
+        suffix = int(time.time())
+        users = User.objects.bulk_create(
+            User(username=f'bench_{suffix}_{number}')
+            for number in range(n_users)
+        )
+        if not all(user.pk for user in users):
+            users = list(User.objects.filter(
+                username__startswith=f'bench_{suffix}_'
+            ))
+        categories = [
+            Category.objects.create(
+                title=f'Категория {number}',
+                description='',
+                slug=f'bench-{suffix}-{number}',
+                is_published=number % 10 != 0,
+            )
+            for number in range(N_CATEGORIES)
+        ]
+        locations = [
+            Location.objects.create(name=f'Место {number}')
+            for number in range(N_LOCATIONS)
+        ]
+        now = timezone.now()
+        for start in range(0, n_posts, batch_size):
+            Post.objects.bulk_create(
+                Post(
+                    title=f'Пост {number}',
+                    text='Текст публикации. ' * 20,
+                    pub_date=now - timedelta(minutes=random.randint(
+                        -60 * 24 * 30, 60 * 24 * 365 * 5
+                    )),
+                    author=random.choice(users),
+                    location=random.choice(locations),
+                    category=random.choice(categories),
+                    is_published=random.random() > 0.05,
+                )
+                for number in range(start, min(start + batch_size, n_posts))
+            )
+        # bulk_create не вызывает save(), флаг видимости считаем отдельно.
+        Post.objects.refresh_visibility(now)
+        # Профиль и комментарии меряем на видимом посте, а не на первом
+        # пользователе: при малом --posts у него может не быть постов.
+        self.bench_post = Post.objects.visible().filter(
+            author__in=users
+        ).select_related('author').order_by('pk').first()
+        if self.bench_post is None:
+            raise CommandError(
+                'Среди сгенерированных нет видимых постов, увеличьте --posts.'
+            )
+        self.bench_user = self.bench_post.author
+        self.bench_category = categories[1]
+        Comment.objects.bulk_create(
+            Comment(post=self.bench_post, author=random.choice(users),
+                    text='Комментарий')
+            for _ in range(batch_size)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def view_queryset(self, view_class, **kwargs):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        view = view_class()
+        view.setup(request, **kwargs)
+        return view.get_queryset()
+
+    def hot_queries(self):
+        return {
+            'Лента': self.view_queryset(PostListView),
+            'Категория': self.view_queryset(
+                CategoryListView, slug=self.bench_category.slug
+            ),
+            'Профиль': self.view_queryset(
+                UserListView, username=self.bench_user.username
+            ),
+            'Комментарии': self.bench_post.comments.select_related('author'),
+        }
+
+    def report(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in queries.items():
+            page = queryset[:10]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(page.all())
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            self.stdout.write(self.style.MIGRATE_LABEL(
+                f'{name}: {elapsed:.1f} мс'
+            ))
+            self.stdout.write(page.explain())
@@ -0,0 +1,103 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from blog import search
+from blog.models import Category, Post
+
+
+User = get_user_model()
+
+N_POSTS = 100_000
+BATCH_SIZE = 10_000
+REPEAT = 5
+WORDS_PER_POST = 60
+RARE_WORDS = 50_000
+VOCABULARY = (
+    'город река горы лес море путешествие поезд самолёт музей театр '
+    'кофе завтрак прогулка велосипед книга библиотека концерт парк '
+    'осень зима весна лето дождь снег солнце ветер друзья семья'
+).split()
+# Частое слово, префикс и редкие слова: LIKE быстро набирает десяток
+# частых совпадений, но на редких просматривает всю таблицу.
+QUERIES = ('музей', 'библиот', 'метка4242', 'велосипед метка17')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полнотекстовый поиск с поиском через LIKE на '
+        'сгенерированных постах. Все изменения откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=N_POSTS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--repeat', type=int, default=REPEAT)
+
+    def handle(self, *args, posts, batch_size, repeat, **options):
+        backend = search.get_backend()
+        with transaction.atomic():
+            self.generate(posts, batch_size)
+            # bulk_create не отправляет сигналов, индекс строим целиком.
+            backend.rebuild()
+            for query in QUERIES:
+                self.stdout.write(self.style.MIGRATE_HEADING(query))
+                self.measure('LIKE', repeat, lambda: self.like(query))
+                self.measure(
+                    'Полнотекстовый', repeat,
+                    lambda: backend.search(query)[0],
+                )
+                self.measure(
+                    'Админка, полнотекстовый', repeat,
+                    lambda: backend.post_ids(query),
+                )
+            transaction.set_rollback(True)
+
+    def generate(self, n_posts, batch_size):
+        self.stdout.write(f'Генерация {n_posts} постов...')
+        suffix = int(time.time())
+        author = User.objects.create(username=f'bench_search_{suffix}')
+        category = Category.objects.create(
+            title='Поиск', description='', slug=f'bench-search-{suffix}'
+        )
+        now = timezone.now()
+        for start in range(0, n_posts, batch_size):
+            Post.objects.bulk_create(
+                Post(
+                    title=' '.join(random.choices(VOCABULARY, k=4)),
+                    text=' '.join([
+                        *random.choices(VOCABULARY, k=WORDS_PER_POST),
+                        f'метка{random.randrange(RARE_WORDS)}',
+                    ]),
+                    pub_date=now,
+                    author=author,
+                    category=category,
+                )
+                for _ in range(start, min(start + batch_size, n_posts))
+            )
+
+    def like(self, query):
+        # Так искали раньше: подстрока без учёта регистра, полный перебор.
+        condition = Q()
+        for word in search.query_tokens(query):
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        return list(
+            Post.objects.filter(
+                condition, is_published=True,
+                category__is_published=True, pub_date__lte=timezone.now(),
+            ).order_by('-pub_date').values_list('pk', flat=True)[:10]
+        )
+
+    def measure(self, name, repeat, run):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            found = run()
+        elapsed = (time.perf_counter() - started) / repeat * 1000
+        self.stdout.write(self.style.MIGRATE_LABEL(
+            f'{name}: {elapsed:.1f} мс, найдено {len(found)}'
+        ))
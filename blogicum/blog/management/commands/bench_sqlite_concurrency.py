@@ -0,0 +1,108 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import RequestFactory
+
+from blog.models import Category, Comment, Post
+from blog.views import PostListView
+
+
+User = get_user_model()
+
+DURATION = 5
+READERS = 4
+REPORTED_PRAGMAS = (
+    'journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'busy_timeout',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет пропускную способность чтения ленты, пока в соседнем '
+        'потоке непрерывно пишутся комментарии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=DURATION)
+        parser.add_argument('--readers', type=int, default=READERS)
+
+    def handle(self, *args, duration, readers, **options):
+        with connection.cursor() as cursor:
+            for pragma in REPORTED_PRAGMAS:
+                cursor.execute(f'PRAGMA {pragma}')
+                self.stdout.write(f'{pragma} = {cursor.fetchone()[0]}')
+
+        suffix = int(time.time())
+        author = User.objects.create(username=f'bench_writer_{suffix}')
+        category = Category.objects.create(
+            title='Нагрузочный тест', description='',
+            slug=f'bench-concurrency-{suffix}',
+        )
+        post = Post.objects.create(
+            title='Нагрузочный тест', text='', author=author,
+            category=category, pub_date=category.created_at,
+        )
+        self.stop = threading.Event()
+        self.stats = {'reads': 0, 'writes': 0, 'read_errors': 0,
+                      'write_errors': 0}
+        self.lock = threading.Lock()
+        threads = [threading.Thread(target=self.writer, args=(post,))] + [
+            threading.Thread(target=self.reader) for _ in range(readers)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            time.sleep(duration)
+        finally:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+            post.delete()
+            category.delete()
+            author.delete()
+
+        stats = self.stats
+        self.stdout.write(self.style.SUCCESS(
+            f'Чтений ленты: {stats["reads"] / duration:.0f}/с '
+            f'({readers} потоков), ошибок: {stats["read_errors"]}'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей комментариев: {stats["writes"] / duration:.0f}/с, '
+            f'ошибок: {stats["write_errors"]}'
+        ))
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def reader(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        try:
+            while not self.stop.is_set():
+                view = PostListView()
+                view.setup(request)
+                try:
+                    list(view.get_queryset()[:10])
+                    self.count('reads')
+                except OperationalError:
+                    self.count('read_errors')
+        finally:
+            connection.close()
+
+    def writer(self, post):
+        try:
+            while not self.stop.is_set():
+                try:
+                    Comment.objects.create(
+                        post=post, author=post.author, text='Комментарий'
+                    )
+                    self.count('writes')
+                except OperationalError:
+                    self.count('write_errors')
+        finally:
+            connection.close()
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from blog import cache
+from blog.models import Post
+
+
+INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает отложенные посты, у которых наступило время публикации, '
+        'и сбрасывает кэш их страниц. С --loop работает постоянно и '
+        'просыпается к ближайшей публикации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument(
+            '--interval', type=float, default=INTERVAL,
+            help='Наибольшая пауза между проверками, секунды.',
+        )
+
+    def handle(self, *args, loop, interval, **options):
+        while True:
+            self.publish()
+            if not loop:
+                return
+            try:
+                time.sleep(self.seconds_to_next(interval))
+            except KeyboardInterrupt:
+                return
+
+    def publish(self):
+        now = timezone.now()
+        # Теги собираем до UPDATE: после него посты уже не «устаревшие».
+        tags = {cache.FEED_TAG}
+        stale = Post.objects.stale_visibility(now).values_list(
+            'pk', 'category__slug', 'author__username'
+        )
+        for pk, category_slug, username in stale.iterator():
+            tags.update((
+                cache.post_tag(pk),
+                category_slug and cache.category_tag(category_slug),
+                cache.user_tag(username),
+            ))
+        if len(tags) == 1:
+            return
+        changed = Post.objects.refresh_visibility(now)
+        cache.invalidate(*tags)
+        self.stdout.write(f'Видимость обновлена у постов: {changed}')
+
+    def seconds_to_next(self, interval):
+        # Пост могут запланировать на ближайшие секунды уже после этой
+        # проверки, поэтому пауза не длиннее interval.
+        now = timezone.now()
+        next_pub_date = Post.objects.filter(
+            is_published=True, is_visible=False, pub_date__gt=now
+        ).aggregate(next=Min('pub_date'))['next']
+        if next_pub_date is None:
+            return interval
+        return min(interval, max((next_pub_date - now).total_seconds(), 0))
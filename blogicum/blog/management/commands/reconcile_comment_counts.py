@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Сверяет Post.comment_count с реальным числом комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько постов исправлять за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать число расхождений.'
+        )
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        totals = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(
+            total=Count('pk')
+        ).values('total')
+        drifted = Post.objects.annotate(
+            actual=Coalesce(Subquery(totals), 0)
+        ).exclude(
+            comment_count=F('actual')
+        ).order_by().values_list('pk', 'actual')
+
+        # Расхождений обычно немного: забираем их целиком, чтобы не писать
+        # в таблицу, по которой ещё открыт курсор.
+        drifted = list(drifted)
+        fixed = 0
+        for start in range(0, len(drifted), batch_size):
+            batch = [
+                Post(pk=pk, comment_count=actual)
+                for pk, actual in drifted[start:start + batch_size]
+            ]
+            fixed += self.save_batch(batch, dry_run)
+
+        verb = 'Найдено' if dry_run else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} расхождений счётчика комментариев: {fixed}'
+        ))
+
+    def save_batch(self, batch, dry_run):
+        if batch and not dry_run:
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ['comment_count'])
+        return len(batch)
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# SQL продублирован здесь, а не взят из blog.search: миграция должна
+# работать и после того, как модуль поиска изменится.
+SQLITE_CREATE = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS blog_search USING fts5('
+    'title, body, kind UNINDEXED, object_id UNINDEXED, post_id UNINDEXED, '
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    'INSERT INTO blog_search (rowid, title, body, kind, object_id, post_id) '
+    "SELECT id * 2, title, text, 'post', id, id FROM blog_post",
+    'INSERT INTO blog_search (rowid, title, body, kind, object_id, post_id) '
+    "SELECT id * 2 + 1, '', text, 'comment', id, post_id FROM blog_comment",
+)
+SQLITE_DROP = ('DROP TABLE IF EXISTS blog_search',)
+
+POSTGRES_CREATE = (
+    'CREATE INDEX IF NOT EXISTS blog_post_search_idx ON blog_post USING GIN '
+    "((setweight(to_tsvector('russian', title), 'A') || "
+    "setweight(to_tsvector('russian', text), 'B')))",
+    'CREATE INDEX IF NOT EXISTS blog_comment_search_idx ON blog_comment '
+    "USING GIN (to_tsvector('russian', text))",
+)
+POSTGRES_DROP = (
+    'DROP INDEX IF EXISTS blog_post_search_idx',
+    'DROP INDEX IF EXISTS blog_comment_search_idx',
+)
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({
+                'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE,
+            }),
+            run_for_vendor({
+                'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP,
+            }),
+        ),
+    ]
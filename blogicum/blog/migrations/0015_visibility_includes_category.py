@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:03
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def hide_posts_of_hidden_categories(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(is_visible=True).exclude(
+        category__is_published=True
+    ).update(is_visible=False)
+
+
+def show_posts_regardless_of_category(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(
+        is_published=True, pub_date__lte=timezone.now()
+    ).update(is_visible=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_published_pub_date_idx',
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, help_text='Пост и категория опубликованы, время публикации наступило; отложенные посты открывает команда publish_scheduled.', verbose_name='Виден читателям'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['-pub_date'], name='post_visible_pub_date_idx'),
+        ),
+        migrations.RunPython(
+            hide_posts_of_hidden_categories,
+            show_posts_regardless_of_category,
+        ),
+    ]
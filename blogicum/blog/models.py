@@ -1,20 +1,66 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.db.models import Case, Exists, OuterRef, Q, When
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import Truncator
 
 from core.models import PublishedModel, CreatedAtModel
 
 
 MAX_LEN_TITLE = 256
+EXCERPT_WORDS = 10
 
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    def visible(self):
+        return self.filter(is_visible=True)
+
+    @staticmethod
+    def visible_condition(now):
+        # Категория — через EXISTS, без JOIN: условие годится и для UPDATE.
+        published_category = Category.objects.filter(
+            pk=OuterRef('category_id'), is_published=True
+        )
+        return Q(
+            Exists(published_category), is_published=True, pub_date__lte=now
+        )
+
+    def stale_visibility(self, now):
+        """Посты, у которых флаг is_visible разошёлся с расписанием."""
+        should_be_visible = self.visible_condition(now)
+        return self.filter(
+            (should_be_visible & Q(is_visible=False))
+            | (~should_be_visible & Q(is_visible=True))
+        )
+
+    def refresh_visibility(self, now=None):
+        """Пересчитывает is_visible на момент now одним UPDATE.
+
+        Возвращает число изменённых постов. Условие отбора — то же, что
+        в stale_visibility(), поэтому размер запроса не зависит от числа
+        постов, а пост, изменённый параллельно, всё равно получит верный
+        флаг.
+        """
+        now = now or timezone.now()
+        return self.stale_visibility(now).update(is_visible=Case(
+            When(self.visible_condition(now), then=True), default=False
+        ))
+
+
 class Post(PublishedModel, CreatedAtModel):
     title = models.CharField(
         max_length=MAX_LEN_TITLE,
         verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Анонс',
+        help_text='Начало текста для ленты, заполняется при сохранении.'
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text=('Если установить дату и время в будущем'
@@ -38,17 +84,80 @@ class Post(PublishedModel, CreatedAtModel):
         null=True,
         verbose_name='Категория',
     )
-    image = models.ImageField('Фото', blank=True)
+    # Индекс для подсчёта ссылок хранилища (core/storage.py).
+    image = models.ImageField('Фото', blank=True, db_index=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментарии',
+        help_text='Поддерживается автоматически при изменении комментариев.'
+    )
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Виден читателям',
+        help_text=('Пост и категория опубликованы, время публикации '
+                   'наступило; отложенные посты открывает команда '
+                   'publish_scheduled.')
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
+        indexes = (
+            # Частичный индекс: Django пишет условие как WHERE is_visible,
+            # и по составному (is_visible, pub_date) SQLite шёл бы полным
+            # перебором с сортировкой.
+            models.Index(
+                fields=('-pub_date',),
+                condition=models.Q(is_visible=True),
+                name='post_visible_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date'),
+                name='post_category_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def make_excerpt(text):
+        return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = self.make_excerpt(self.text)
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = {
+                    *update_fields, 'excerpt'
+                }
+        if update_fields is None or {
+                'is_published', 'pub_date', 'category'} & set(update_fields):
+            self.is_visible = (
+                self.is_published
+                and self.pub_date <= timezone.now()
+                and self.category is not None
+                and self.category.is_published
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'is_visible'}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'pk': self.pk})
 
@@ -106,9 +215,20 @@ class Comment(CreatedAtModel):
         ordering = ('created_at',)
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Счётчик в Post обновляется сигналом post_save в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'pk': self.post.id})
@@ -0,0 +1,177 @@
+import base64
+import hashlib
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from . import cache
+
+
+DEFAULT_CURSOR_ORDERING = ('-pub_date', '-id')
+
+
+def encode_cursor_values(values):
+    """Непрозрачный токен курсора из значений полей сортировки."""
+    # isoformat сохраняет микросекунды, без них сравнение по курсору
+    # пропускало бы объекты с одинаковой до миллисекунды датой.
+    raw = json.dumps(values, default=lambda value: value.isoformat()).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor_values(token, size):
+    """Значения из токена курсора; ValueError, если токен испорчен."""
+    raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    values = json.loads(raw)
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Некорректный курсор.')
+    return values
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который хранит число объектов в кэше.
+
+    Ключ — подпись запроса (SQL и параметры) и версии кэша ленты, так что
+    любая запись поста сбрасывает счётчики. Отложенные посты открывает
+    команда publish_scheduled, она тоже сбрасывает версию ленты.
+    """
+
+    def count_cache_key(self):
+        sql, params = self.object_list.query.sql_with_params()
+        versions = cache.get_tag_versions([cache.FEED_TAG, cache.GLOBAL_TAG])
+        signature = repr((sql, params, versions))
+        digest = hashlib.md5(signature.encode()).hexdigest()
+        return f'blog:count:{digest}'
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        key = self.count_cache_key()
+        count = cache.get_cache().get(key)
+        if count is None:
+            count = super().count
+            cache.get_cache().set(
+                key, count, settings.BLOG_PAGE_COUNT_CACHE_TIMEOUT
+            )
+        return count
+
+
+class CursorPaginator:
+    """Пагинация по курсору (keyset) без COUNT(*) и OFFSET.
+
+    Страница выбирается условием на поля сортировки относительно
+    последнего (или первого) объекта соседней страницы, поэтому
+    стоимость запроса не зависит от глубины страницы.
+    """
+
+    is_cursor = True
+    page_range = ()
+
+    def __init__(self, object_list, per_page,
+                 ordering=DEFAULT_CURSOR_ORDERING):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+
+    def encode_cursor(self, obj):
+        return encode_cursor_values(
+            [getattr(obj, name) for name in self.fields]
+        )
+
+    def decode_cursor(self, token):
+        try:
+            values = decode_cursor_values(token, len(self.fields))
+            model_meta = self.object_list.model._meta
+            return [
+                model_meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise Http404('Некорректный курсор страницы.')
+
+    def _keyset_filter(self, values, forward):
+        """Условие «строго после» (forward) или «строго до» курсора."""
+        condition = Q()
+        for index, order in enumerate(self.ordering):
+            descending = order.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{self.fields[index]}__{lookup}': values[index]})
+            for name, value in zip(self.fields[:index], values[:index]):
+                step &= Q(**{name: value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return tuple(
+            order[1:] if order.startswith('-') else f'-{order}'
+            for order in self.ordering
+        )
+
+    def page(self, after=None, before=None):
+        queryset = self.object_list
+        if before:
+            values = self.decode_cursor(before)
+            rows = list(
+                queryset.filter(self._keyset_filter(values, forward=False))
+                .order_by(*self._reversed_ordering())[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return CursorPage(rows, self, has_previous, has_next=True)
+        queryset = queryset.order_by(*self.ordering)
+        if after:
+            values = self.decode_cursor(after)
+            queryset = queryset.filter(
+                self._keyset_filter(values, forward=True)
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page], self, bool(after), has_next
+        )
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации, совместимая с шаблоном пагинатора."""
+
+    number = None
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous and bool(object_list)
+        self._has_next = has_next and bool(object_list)
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
@@ -0,0 +1,282 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+В SQLite индекс — виртуальная таблица FTS5 blog_search (миграция 0013),
+её держат в актуальном состоянии сигналы. В PostgreSQL поиск идёт по
+to_tsvector, для которого миграция создаёт GIN-индексы по выражениям,
+поэтому синхронизировать ничего не нужно.
+
+Результаты упорядочены по релевантности (чем меньше score, тем лучше) и
+ключу строки, по этой паре строится курсор следующей страницы.
+"""
+import re
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+from django.db import connections, router
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Comment, Post
+
+
+SEARCH_TABLE = 'blog_search'
+POST, COMMENT = 'post', 'comment'
+RESULTS_PER_PAGE = 10
+ADMIN_SEARCH_LIMIT = 500
+MAX_QUERY_TOKENS = 8
+SNIPPET_WORDS = 24
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+POSTGRES_CONFIG = 'russian'
+
+# Границы подсветки — управляющие символы, которых нет в тексте:
+# текст экранируется целиком, и только потом они становятся <mark>.
+HIGHLIGHT_START, HIGHLIGHT_STOP = '\x02', '\x03'
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+class SearchHit(NamedTuple):
+    kind: str
+    object_id: int
+    post_id: int
+    score: float
+    key: int
+    title: str
+    snippet: str
+
+    @property
+    def cursor(self):
+        return [self.score, self.key]
+
+
+def query_tokens(query):
+    """Слова запроса: пунктуация и операторы языка запросов отбрасываются."""
+    return TOKEN_RE.findall(query)[:MAX_QUERY_TOKENS]
+
+
+def row_key(kind, object_id):
+    """Ключ строки индекса: посты чётные, комментарии нечётные."""
+    return object_id * 2 + (kind == COMMENT)
+
+
+def highlight(text):
+    return mark_safe(
+        escape(text or '')
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_STOP, '</mark>')
+    )
+
+
+def _tables():
+    return {
+        'search': SEARCH_TABLE,
+        'post': Post._meta.db_table,
+        'comment': Comment._meta.db_table,
+    }
+
+
+# Публичность поста — то же условие, что у ленты.
+VISIBLE_POST_SQL = 'p.is_visible'
+
+
+class SearchBackend(ABC):
+    """Общий интерфейс: индексирование, выдача для сайта и для админки."""
+
+    def index_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove(self, kind, object_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, after=None, limit=RESULTS_PER_PAGE):
+        """Возвращает (результаты, есть ли следующая страница)."""
+        tokens = query_tokens(query)
+        if not tokens:
+            return [], False
+        sql, params = self.search_sql(tokens, after, limit + 1)
+        with connections[router.db_for_read(Post)].cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        hits = [
+            SearchHit(
+                kind, object_id, post_id, score, key,
+                highlight(title_match if kind == POST else post_title),
+                highlight(snippet),
+            )
+            for (kind, object_id, post_id, score, key, post_title,
+                 title_match, snippet) in rows
+        ]
+        return hits[:limit], len(hits) > limit
+
+    def post_ids(self, query, limit=ADMIN_SEARCH_LIMIT):
+        """Id постов, в заголовке или тексте которых есть слова запроса."""
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        sql, params = self.post_ids_sql(tokens, limit)
+        with connections[router.db_for_read(Post)].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [post_id for post_id, in cursor.fetchall()]
+
+    @abstractmethod
+    def search_sql(self, tokens, after, limit):
+        """SQL и параметры выдачи для сайта, по строке сверх limit."""
+
+    @abstractmethod
+    def post_ids_sql(self, tokens, limit):
+        """SQL и параметры id постов для поиска в админке."""
+
+
+class SqliteSearchBackend(SearchBackend):
+    def match_expression(self, tokens):
+        # Каждое слово в кавычках — как префикс, слова объединяются по И.
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def execute(self, sql, params=()):
+        connection = connections[router.db_for_write(Post)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql.format(**_tables()), params)
+
+    def write(self, kind, object_id, post_id, title, body):
+        self.execute(
+            'INSERT OR REPLACE INTO {search} '
+            '(rowid, title, body, kind, object_id, post_id) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            [row_key(kind, object_id), title, body, kind, object_id,
+             post_id],
+        )
+
+    def index_post(self, post):
+        self.write(POST, post.pk, post.pk, post.title, post.text)
+
+    def index_comment(self, comment):
+        self.write(COMMENT, comment.pk, comment.post_id, '', comment.text)
+
+    def remove(self, kind, object_id):
+        self.execute(
+            'DELETE FROM {search} WHERE rowid = %s',
+            [row_key(kind, object_id)],
+        )
+
+    def rebuild(self):
+        self.execute('DELETE FROM {search}')
+        self.execute(
+            'INSERT INTO {search} (rowid, title, body, kind, object_id, '
+            "post_id) SELECT id * 2, title, text, 'post', id, id FROM {post}"
+        )
+        self.execute(
+            'INSERT INTO {search} (rowid, title, body, kind, object_id, '
+            "post_id) SELECT id * 2 + 1, '', text, 'comment', id, post_id "
+            'FROM {comment}'
+        )
+
+    def search_sql(self, tokens, after, limit):
+        # Вспомогательные функции FTS5 не принимают псевдоним таблицы.
+        score = 'bm25({search}, %s, %s)'
+        weights = [TITLE_WEIGHT, BODY_WEIGHT]
+        marks = [HIGHLIGHT_START, HIGHLIGHT_STOP]
+        sql = (
+            f'SELECT {{search}}.kind, {{search}}.object_id, '
+            f'{{search}}.post_id, {score} AS score, {{search}}.rowid, '
+            'p.title, highlight({search}, 0, %s, %s), '
+            "snippet({search}, 1, %s, %s, '…', %s) "
+            'FROM {search} '
+            'JOIN {post} p ON p.id = {search}.post_id '
+            f'WHERE {{search}} MATCH %s AND {VISIBLE_POST_SQL} '
+        )
+        params = [*weights, *marks, *marks, SNIPPET_WORDS,
+                  self.match_expression(tokens)]
+        if after:
+            sql += (
+                f'AND ({score} > %s OR '
+                f'({score} = %s AND {{search}}.rowid > %s)) '
+            )
+            after_score, after_key = after
+            params += [*weights, after_score, *weights, after_score,
+                       after_key]
+        sql += 'ORDER BY score, {search}.rowid LIMIT %s'
+        return sql.format(**_tables()), [*params, limit]
+
+    def post_ids_sql(self, tokens, limit):
+        sql = (
+            "SELECT post_id FROM {search} WHERE {search} MATCH %s "
+            "AND kind = 'post' ORDER BY rank LIMIT %s"
+        ).format(**_tables())
+        return sql, [self.match_expression(tokens), limit]
+
+
+# Выражения совпадают с выражениями GIN-индексов миграции 0013.
+POSTGRES_POST_VECTOR = (
+    f"setweight(to_tsvector('{POSTGRES_CONFIG}', p.title), 'A') || "
+    f"setweight(to_tsvector('{POSTGRES_CONFIG}', p.text), 'B')"
+)
+POSTGRES_COMMENT_VECTOR = f"to_tsvector('{POSTGRES_CONFIG}', cm.text)"
+
+
+class PostgresSearchBackend(SearchBackend):
+    def tsquery(self, tokens):
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def search_sql(self, tokens, after, limit):
+        options = (
+            f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+            f'MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 3}'
+        )
+        query = f"to_tsquery('{POSTGRES_CONFIG}', %s) q"
+        headline = f"ts_headline('{POSTGRES_CONFIG}', {{}}, q, %s)"
+        sql = (
+            'SELECT * FROM ('
+            f"SELECT 'post' AS kind, p.id AS object_id, p.id AS post_id, "
+            f'-ts_rank({POSTGRES_POST_VECTOR}, q) AS score, '
+            'p.id * 2 AS key, p.title AS post_title, '
+            f'{headline.format("p.title")} AS title, '
+            f'{headline.format("p.text")} AS snippet '
+            'FROM {post} p, '
+            f'{query} '
+            f'WHERE {POSTGRES_POST_VECTOR} @@ q AND {VISIBLE_POST_SQL} '
+            'UNION ALL '
+            "SELECT 'comment', cm.id, p.id, "
+            f'-ts_rank({POSTGRES_COMMENT_VECTOR}, q), '
+            "cm.id * 2 + 1, p.title, '', "
+            f'{headline.format("cm.text")} '
+            'FROM {comment} cm JOIN {post} p ON p.id = cm.post_id, '
+            f'{query} '
+            f'WHERE {POSTGRES_COMMENT_VECTOR} @@ q AND {VISIBLE_POST_SQL}'
+            ') hits '
+        ).format(**_tables())
+        tsquery = self.tsquery(tokens)
+        params = [options, options, tsquery, options, tsquery]
+        if after:
+            sql += 'WHERE score > %s OR (score = %s AND key > %s) '
+            after_score, after_key = after
+            params += [after_score, after_score, after_key]
+        sql += 'ORDER BY score, key LIMIT %s'
+        return sql, [*params, limit]
+
+    def post_ids_sql(self, tokens, limit):
+        sql = (
+            f'SELECT p.id FROM {{post}} p, {{query}} '
+            f'WHERE {POSTGRES_POST_VECTOR} @@ q '
+            f'ORDER BY ts_rank({POSTGRES_POST_VECTOR}, q) DESC LIMIT %s'
+        ).format(
+            query=f"to_tsquery('{POSTGRES_CONFIG}', %s) q", **_tables()
+        )
+        return sql, [self.tsquery(tokens), limit]
+
+
+BACKENDS = {
+    'sqlite': SqliteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(using=None):
+    using = using or router.db_for_read(Post)
+    return BACKENDS[connections[using].vendor]()
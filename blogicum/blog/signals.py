@@ -0,0 +1,176 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+
+from core import jobs
+
+from . import cache, search, tasks
+from .models import Category, Comment, Location, Post
+
+
+User = get_user_model()
+
+
+def change_comment_count(post_id, delta):
+    """Атомарно изменяет денормализованный счётчик комментариев поста."""
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        # Не уходим ниже нуля, даже если счётчик успел разойтись с данными.
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+def post_page_tags(post_id):
+    """Теги страниц, на которых показан пост: лента, категория, профиль."""
+    tags = [cache.FEED_TAG, cache.post_tag(post_id)]
+    row = Post.objects.filter(pk=post_id).values_list(
+        'category__slug', 'author__username'
+    ).first()
+    if row:
+        slug, username = row
+        tags += [cache.category_tag(slug), cache.user_tag(username)]
+    return tags
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        change_comment_count(instance.post_id, 1)
+    cache.invalidate_on_commit(*post_page_tags(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_comment_count(instance.post_id, -1)
+    cache.invalidate_on_commit(*post_page_tags(instance.post_id))
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def remember_post_pages(sender, instance, **kwargs):
+    # Пост мог сменить категорию: старую страницу тоже нужно сбросить.
+    instance._previous_page_tags = (
+        post_page_tags(instance.pk) if instance.pk else []
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    cache.invalidate_on_commit(
+        *getattr(instance, '_previous_page_tags', []),
+        *post_page_tags(instance.pk),
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_indexed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'title', 'text'} & set(update_fields):
+        return
+    search.get_backend().index_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_indexed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'text' not in update_fields:
+        return
+    search.get_backend().index_comment(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def removed_from_index(sender, instance, **kwargs):
+    kind = search.POST if sender is Post else search.COMMENT
+    search.get_backend().remove(kind, instance.pk)
+
+
+def release_image(name):
+    # Одинаковые загрузки хранятся одним файлом на несколько постов, а при
+    # откате транзакции пост со ссылкой на файл остаётся.
+    transaction.on_commit(lambda: tasks.release_image(name))
+
+
+@receiver(pre_save, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    instance._previous_image = instance.pk and Post.objects.filter(
+        pk=instance.pk
+    ).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def image_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'image' not in update_fields:
+        return
+    previous = getattr(instance, '_previous_image', None)
+    if previous == instance.image.name:
+        return
+    if previous:
+        release_image(previous)
+    if instance.image:
+        # Варианты строит воркер; до него их отдаёт ThumbnailView.
+        jobs.enqueue(tasks.generate_image_variants, instance.image.name)
+
+
+@receiver(post_delete, sender=Post)
+def image_deleted(sender, instance, **kwargs):
+    if instance.image:
+        release_image(instance.image.name)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, **kwargs):
+    instance._was_published = instance.pk and Category.objects.filter(
+        pk=instance.pk
+    ).values_list('is_published', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    # Видимость постов включает публикацию категории: пересчитываем её
+    # одним UPDATE, когда флаг категории изменился.
+    if not created and instance._was_published != instance.is_published:
+        Post.objects.filter(category=instance).refresh_visibility()
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # Посты удалённой категории остаются без неё и скрываются из лент.
+    Post.objects.filter(category__isnull=True).refresh_visibility()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def catalog_changed(sender, instance, **kwargs):
+    # Категории и места показаны почти на каждой странице и меняются
+    # редко, поэтому их изменение сбрасывает весь кэш страниц.
+    cache.invalidate_on_commit(cache.GLOBAL_TAG)
+
+
+def is_login_update(update_fields):
+    return bool(update_fields) and set(update_fields) == {'last_login'}
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    if not instance.pk or is_login_update(update_fields):
+        return
+    instance._previous_username = User.objects.filter(
+        pk=instance.pk
+    ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if is_login_update(update_fields):
+        return
+    previous = getattr(instance, '_previous_username', None)
+    if previous and previous != instance.username:
+        # Имя автора выводится в карточках постов по всему сайту.
+        cache.invalidate_on_commit(cache.GLOBAL_TAG)
+    cache.invalidate_on_commit(cache.user_tag(instance.username))
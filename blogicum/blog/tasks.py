@@ -0,0 +1,29 @@
+from django.conf import settings
+
+from core import jobs
+from core.jobs import task
+
+from . import images
+from .models import Post
+
+
+@task(queue='images')
+def generate_image_variants(name):
+    # Пока задание ждало, пост могли удалить или сменить ему картинку.
+    if Post.objects.filter(image=name).exists():
+        images.generate_variants(name)
+
+
+@task()
+def release_image(name):
+    """Удаляет картинку и её варианты, если на неё больше нет ссылок."""
+    released = Post._meta.get_field('image').storage.release(name)
+    if released is None:
+        # Файл только что загрузили повторно, ссылка на него может быть
+        # ещё не закоммичена.
+        jobs.enqueue(
+            release_image, name,
+            delay=settings.CONTENT_STORAGE_GRACE_SECONDS,
+        )
+    elif released:
+        images.delete_variants(name)
@@ -0,0 +1,22 @@
+from django import template
+
+from blog import images
+
+register = template.Library()
+
+# Карточка в ленте не шире 40rem.
+CARD_SIZES = '(max-width: 640px) 100vw, 640px'
+
+
+@register.inclusion_tag('includes/picture.html')
+def responsive_image(image, sizes=CARD_SIZES, css_class=''):
+    """<picture> с вариантами WebP и JPEG вместо оригинала."""
+    return {
+        'webp_srcset': images.srcset(image.name, 'webp'),
+        'jpeg_srcset': images.srcset(image.name, 'jpeg'),
+        'src': images.variant_url(
+            image.name, images.THUMBNAIL_WIDTHS[0], 'jpeg'
+        ),
+        'sizes': sizes,
+        'css_class': css_class,
+    }
@@ -18,6 +18,9 @@ urlpatterns = [
     path('posts/<int:pk>/delete/',
          views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('posts/<int:pk>/comments/',
+         views.PostCommentsView.as_view(),
+         name='post_comments'),
     path('posts/<int:pk>/comment/',
          views.CommentCreateView.as_view(),
          name='add_comment'),
@@ -33,6 +36,12 @@ urlpatterns = [
     path('profile/<slug:username>/',
          views.UserListView.as_view(),
          name='profile'),
+    path('search/',
+         views.SearchView.as_view(),
+         name='search'),
+    path('thumbs/<int:width>/<str:fmt>/<path:name>',
+         views.ThumbnailView.as_view(),
+         name='thumbnail'),
     path('user/',
          views.UserUpdateView.as_view(),
          name='edit_profile'),
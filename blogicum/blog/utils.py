@@ -2,8 +2,9 @@ from blog.models import Post
 
 
 def posts_query_set():
+    """Посты для лент: полный текст не нужен, карточка выводит анонс."""
     return (Post.objects.select_related(
         'location',
         'category',
         'author',
-    ))
+    ).defer('text'))
@@ -1,48 +1,241 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Max
 from django.http import Http404
-from django.utils import timezone
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views.generic import (
-    ListView, CreateView, UpdateView, DeleteView, DetailView)
+    ListView, CreateView, UpdateView, DeleteView, DetailView, TemplateView,
+    View)
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Count
+from PIL import Image
+
+from . import cache, images, search
+from core import media
+from core.routers import PIN_COOKIE_NAME, replica_reads
 
 from .models import Post, Category, Comment
 from .forms import CommentForm, PostForm, UserUdateForm
+from .paginators import (
+    CachedCountPaginator, CursorPaginator, decode_cursor_values,
+    encode_cursor_values)
 from .utils import posts_query_set
 
 
 User = get_user_model()
 
 COUNT_POSTS_PER_PAGE = 10
+COUNT_COMMENTS_PER_PAGE = 20
 
 
 class PaginateListViewMixin(ListView):
     paginate_by = COUNT_POSTS_PER_PAGE
+    paginator_class = CachedCountPaginator
+    pages_on_each_side = 2
+    pages_on_ends = 1
+
+    def paginate_queryset(self, queryset, page_size):
+        """При BLOG_CURSOR_PAGINATION листаем по курсору ?after=/?before=."""
+        if not settings.BLOG_CURSOR_PAGINATION:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size)
+        page = paginator.page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['post_cards'] = cache.render_post_cards(
+            context['object_list']
+        )
+        paginator = context['paginator']
+        if paginator is not None and not getattr(
+                paginator, 'is_cursor', False):
+            # Первая и последняя страницы, соседи текущей и многоточия
+            # вместо ссылки на каждую страницу ленты.
+            context['page_range'] = paginator.get_elided_page_range(
+                context['page_obj'].number,
+                on_each_side=self.pages_on_each_side,
+                on_ends=self.pages_on_ends,
+            )
+        return context
+
+
+class AnonymousPageCacheMixin:
+    """Отдаёт анонимным посетителям страницу из кэша.
+
+    Наследники перечисляют в get_cache_tags() теги, при инвалидации
+    которых страница должна быть отрисована заново. Исход (hit, miss,
+    bypass) записывается в request.page_cache_status для метрик.
+    """
+
+    def get_cache_tags(self):
+        return []
+
+    def dispatch(self, request, *args, **kwargs):
+        if (not settings.BLOG_PAGE_CACHE_ENABLED
+                or request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            request.page_cache_status = 'bypass'
+            return super().dispatch(request, *args, **kwargs)
+        key = cache.page_cache_key(request, self.get_cache_tags())
+        response = cache.get_cache().get(key)
+        if response is not None:
+            request.page_cache_status = 'hit'
+            return response
+        request.page_cache_status = 'miss'
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and hasattr(
+                response, 'add_post_render_callback'):
+            response.add_post_render_callback(
+                lambda rendered: self.store_page(key, rendered)
+            )
+        return response
+
+    def store_page(self, key, response):
+        # Страница с CSRF-токеном или cookie личная — её не кэшируем.
+        if response.cookies or self.request.META.get('CSRF_COOKIE_USED'):
+            return
+        cache.get_cache().set(
+            key, response, settings.BLOG_PAGE_CACHE_TIMEOUT
+        )
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified, не выполняя основных запросов страницы.
+
+    Last-Modified — время последнего сброса тегов страницы, но не
+    раньше get_last_modified(). Оно запоминается в кэше под версиями
+    тегов, поэтому повторная проверка не обращается к базе, а любая
+    запись, меняющая страницу, сбрасывает и его. По умолчанию
+    get_last_modified() — самая поздняя pub_date из get_queryset().
+    """
+
+    def get_cache_tags(self):
+        return []
+
+    def get_last_modified(self):
+        return self.get_queryset().aggregate(
+            latest=Max('pub_date')
+        )['latest']
+
+    def get_validators(self):
+        """(ETag, Last-Modified в секундах) или None — строить страницу."""
+        tags = [*self.get_cache_tags(), cache.GLOBAL_TAG]
+        # Шапка и формы зависят от пользователя, поэтому он входит в ETag.
+        signature = repr([
+            type(self).__name__, self.kwargs, self.request.user.pk,
+            *tags, *cache.get_tag_versions(tags),
+        ])
+        digest = hashlib.md5(signature.encode()).hexdigest()
+        key = f'blog:validators:{digest}'
+        # Кортеж отличает запомненное None от промаха кэша.
+        found = cache.get_cache().get(key)
+        if found is None:
+            last_modified = self.get_last_modified()
+            if last_modified is not None:
+                # Правка поста или удаление комментария не меняют дат
+                # в базе, но сбрасывают теги страницы.
+                last_modified = max(
+                    int(last_modified.timestamp()),
+                    cache.get_last_changed(tags),
+                )
+            found = (last_modified,)
+            cache.get_cache().set(
+                key, found, settings.BLOG_PAGE_CACHE_TIMEOUT
+            )
+        last_modified, = found
+        if last_modified is None:
+            return None
+        return quote_etag(digest), last_modified
+
+    def dispatch(self, request, *args, **kwargs):
+        validators = None
+        if request.method in ('GET', 'HEAD'):
+            validators = self.get_validators()
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+        etag, timestamp = validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        # Хранить можно, но перед показом — сверяться с сервером.
+        patch_cache_control(
+            response, no_cache=True,
+            **{'private' if request.user.is_authenticated else 'public': True}
+        )
+        return response
+
+
+class ReplicaReadMixin:
+    """Читает страницу с реплики, если пользователь недавно не писал."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if PIN_COOKIE_NAME in request.COOKIES:
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            response = super().dispatch(request, *args, **kwargs)
+            # Шаблон обращается к базе, поэтому отрисовываем его здесь же.
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class MemoizedObjectMixin:
+    """Загружает объект один раз за запрос вместе со связанными строками.
+
+    Проверка прав и сама обработка запроса получают один и тот же объект.
+    """
+
+    related_fields = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.related_fields:
+            queryset = queryset.select_related(*self.related_fields)
+        return queryset
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_memoized_object'):
+            self._memoized_object = super().get_object()
+        return self._memoized_object
 
 
-class UserVerification(UserPassesTestMixin):
+class UserVerification(MemoizedObjectMixin, UserPassesTestMixin):
     def test_func(self):
         obj = self.get_object()
-        return (
-            self.request.user.username == obj.author.username
-        )
+        return self.request.user.id == obj.author_id
 
     def handle_no_permission(self):
         raise Http404
 
 
-class CategoryListView(PaginateListViewMixin):
+class CategoryListView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                       ReplicaReadMixin, PaginateListViewMixin):
     model = Category
     template_name = 'blog/category.html'
     slug_url_kwarg, slug_field = 'slug', 'slug'
 
+    def get_cache_tags(self):
+        return [cache.category_tag(self.kwargs['slug'])]
+
     def get_queryset(self):
-        queryset = posts_query_set().filter(
+        queryset = posts_query_set().visible().filter(
             category__slug=self.kwargs['slug'],
-            is_published=True,
-            pub_date__lte=timezone.now(),
         )
         return queryset
 
@@ -58,46 +251,132 @@ class CategoryListView(PaginateListViewMixin):
         return context
 
 
-class PostListView(PaginateListViewMixin):
+class PostListView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                   ReplicaReadMixin, PaginateListViewMixin):
     model = Post
     template_name = 'blog/index.html'
 
+    def get_cache_tags(self):
+        return [cache.FEED_TAG]
+
     def get_queryset(self):
-        queryset = posts_query_set().filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now(),
-        ).annotate(
-            comment_count=Count('comments')
-        ).order_by('-pub_date')
+        queryset = posts_query_set().visible().order_by('-pub_date')
         return queryset
 
 
-class PostDetailView(UserPassesTestMixin, DetailView):
+class PostDetailView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                     ReplicaReadMixin, MemoizedObjectMixin,
+                     UserPassesTestMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
+    related_fields = ('author', 'category', 'location')
+
+    def get_cache_tags(self):
+        return [cache.post_tag(self.kwargs['pk'])]
+
+    def get_last_modified(self):
+        """Время изменения поста или его последнего комментария."""
+        row = Post.objects.filter(pk=self.kwargs['pk']).values(
+            'is_visible', 'author_id', 'updated_at'
+        ).annotate(last_comment_at=Max('comments__created_at')).first()
+        # Скрытый пост видит только автор; остальным 304 не отдаём.
+        if row is None or not (
+                row['is_visible']
+                or row['author_id'] == self.request.user.pk):
+            return None
+        return max(filter(None, (row['updated_at'], row['last_comment_at'])))
 
     def test_func(self):
         post = self.get_object()
         return (
-            (post.is_published
-             and post.category.is_published
-             and post.pub_date <= timezone.now())
+            post.is_visible
             or self.request.user == post.author
         )
 
     def handle_no_permission(self):
         raise Http404
 
+    def get_comments_page(self, after=None):
+        paginator = CursorPaginator(
+            self.object.comments.select_related('author'),
+            COUNT_COMMENTS_PER_PAGE,
+            ordering=('created_at', 'id'),
+        )
+        return paginator.page(after=after)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comments.select_related('author')
+        context['comments'] = self.get_comments_page()
+        return context
+
+
+class PostCommentsView(PostDetailView):
+    """Следующая порция комментариев поста в виде фрагмента HTML."""
+
+    template_name = 'includes/comment_list.html'
+
+    def get_context_data(self, **kwargs):
+        context = DetailView.get_context_data(self, **kwargs)
+        context['comments'] = self.get_comments_page(
+            after=self.request.GET.get('after')
+        )
+        return context
+
+
+class SearchView(ReplicaReadMixin, TemplateView):
+    """Поиск по опубликованным постам и комментариям к ним."""
+
+    template_name = 'blog/search.html'
+
+    def get_after(self):
+        token = self.request.GET.get('after')
+        if not token:
+            return None
+        try:
+            score, key = decode_cursor_values(token, 2)
+            return float(score), int(key)
+        except (TypeError, ValueError):
+            raise Http404('Некорректный курсор страницы.')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        hits, has_next = search.get_backend().search(
+            query, after=self.get_after()
+        )
+        context['query'] = query
+        context['hits'] = hits
+        context['next_cursor'] = (
+            encode_cursor_values(hits[-1].cursor) if has_next else None
         )
         return context
 
 
+class ThumbnailView(View):
+    """Вариант картинки с диска; недостающий создаётся при первом запросе."""
+
+    def get(self, request, width, fmt, name):
+        if (width not in images.THUMBNAIL_WIDTHS
+                or fmt not in images.THUMBNAIL_FORMATS):
+            raise Http404
+        variant = images.variant_name(name, width, fmt)
+        if not images.thumbnail_storage.exists(variant):
+            # Декодируем только картинки постов, а не любой файл из media.
+            if not Post.objects.filter(image=name).exists():
+                raise Http404
+            try:
+                images.generate_variant(name, width, fmt)
+            except (OSError, Image.DecompressionBombError):
+                # Файл не читается как картинка или слишком велик.
+                raise Http404
+        # Имя варианта меняется вместе с оригиналом.
+        return media.serve(
+            request, images.thumbnail_storage, variant, immutable=True,
+            content_type=images.THUMBNAIL_FORMATS[fmt][1],
+        )
+
+
 class UserUpdateView(LoginRequiredMixin, UpdateView):
     model = User
     form_class = UserUdateForm
@@ -115,25 +394,24 @@ class UserUpdateView(LoginRequiredMixin, UpdateView):
         )
 
 
-class UserListView(PaginateListViewMixin):
+class UserListView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                   ReplicaReadMixin, PaginateListViewMixin):
     model = Post
     template_name = 'blog/profile.html'
     slug_url_kwarg, slug_field = 'username', 'username'
-    context_object_name = 'page_obj'
+
+    def get_cache_tags(self):
+        return [cache.user_tag(self.kwargs['username'])]
 
     def get_queryset(self):
         if self.request.user.username == self.kwargs['username']:
             queryset = posts_query_set().filter(
                 author__username=self.kwargs['username']
-            ).annotate(
-                comment_count=Count('comments')
             ).order_by('-pub_date')
         else:
             queryset = posts_query_set().filter(
                 author__username=self.kwargs['username'],
                 is_published=True
-            ).annotate(
-                comment_count=Count('comments')
             ).order_by('-pub_date')
         return queryset
 
@@ -152,17 +430,17 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
     form_class = CommentForm
 
     def dispatch(self, request, *args, **kwargs):
-        self.post_id = get_object_or_404(Post, pk=kwargs['pk'])
+        if not Post.objects.filter(pk=kwargs['pk']).exists():
+            raise Http404
         return super().dispatch(request, *args, **kwargs)
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        form.instance.post_id = self.post_id.id
+        form.instance.post_id = self.kwargs['pk']
         return super().form_valid(form)
 
     def get_success_url(self):
-        pk = self.post_id.id
-        return reverse('blog:post_detail', kwargs={'pk': pk})
+        return reverse('blog:post_detail', kwargs={'pk': self.kwargs['pk']})
 
 
 class CommentUpdateView(LoginRequiredMixin,
@@ -179,12 +457,11 @@ class CommentDeleteView(LoginRequiredMixin,
     model = Comment
     template_name = 'blog/comment.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        self.post_id = get_object_or_404(Post, pk=kwargs['id'])
-        return super().dispatch(request, *args, **kwargs)
+    def get_queryset(self):
+        return super().get_queryset().filter(post_id=self.kwargs['id'])
 
     def get_success_url(self):
-        return reverse('blog:post_detail', kwargs={'pk': self.post_id.id})
+        return reverse('blog:post_detail', kwargs={'pk': self.kwargs['id']})
 
 
 class PostCreateView(LoginRequiredMixin, CreateView):
@@ -216,13 +493,9 @@ class PostDeleteView(LoginRequiredMixin, UserVerification, DeleteView):
     form_class = PostForm
     template_name = 'blog/create.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        self.instance = get_object_or_404(Post, pk=kwargs['pk'])
-        return super().dispatch(request, *args, **kwargs)
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['form'] = PostForm(instance=self.instance)
+        context['form'] = PostForm(instance=self.object)
         return context
 
     def get_success_url(self):
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import importlib.util
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -36,6 +38,7 @@ ALLOWED_HOSTS = [
 # Application definition
 
 INSTALLED_APPS = [
+    'core.apps.CoreConfig',
     'pages.apps.PagesConfig',
     'blog.apps.BlogConfig',
     'django.contrib.admin',
@@ -45,20 +48,26 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django_bootstrap5',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.PrecompressedStaticMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
 ]
 
+# debug_toolbar нужен только при разработке и не входит в зависимости.
+if DEBUG and importlib.util.find_spec('debug_toolbar'):
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -69,7 +78,8 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, который сообщает время отрисовки в замер запроса.
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -93,9 +103,58 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами, а не открывается заново.
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# PostgreSQL включается переменной окружения POSTGRES_DB. Соединения
+# берутся из пула процесса (core/backends/postgresql_pool), а хосты из
+# POSTGRES_REPLICA_HOSTS становятся репликами только для чтения.
+if os.getenv('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.backends.postgresql_pool',
+            'NAME': os.getenv('POSTGRES_DB'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            # Соединение возвращается в пул в конце каждого запроса.
+            'CONN_MAX_AGE': 0,
+            'POOL': {
+                'MIN_SIZE': int(os.getenv('POSTGRES_POOL_MIN_SIZE', 1)),
+                'MAX_SIZE': int(os.getenv('POSTGRES_POOL_MAX_SIZE', 10)),
+            },
+        }
+    }
+    replica_hosts = os.getenv('POSTGRES_REPLICA_HOSTS', '')
+    for number, host in enumerate(filter(None, replica_hosts.split(','))):
+        DATABASES[f'replica{number + 1}'] = {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# Сколько секунд после записи читать из основной базы (отставание реплик).
+DATABASE_REPLICA_PIN_SECONDS = 5
+
+# Прагмы для каждого нового соединения SQLite (см. core/sqlite.py):
+# WAL позволяет читать во время записи комментариев, busy_timeout
+# заставляет писателя подождать вместо ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -139,6 +198,19 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
 ]
 
+STATIC_ROOT = BASE_DIR / 'static'
+
+# В продакшене collectstatic пишет имена с хэшем содержимого и сжатые
+# копии .gz/.br (core/staticfiles.py), а PrecompressedStaticMiddleware
+# отдаёт их. При DEBUG манифеста нет, работает обычное хранилище.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+STATIC_COMPRESS_MIN_SIZE = 256
+# Сколько кэшировать статику без хэша в имени.
+STATIC_CACHE_MAX_AGE = 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -151,6 +223,92 @@ LOGIN_URL = 'login'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+MEDIA_URL = '/media/'
+
+# Сколько кэшировать загрузки со старыми, не хэшевыми именами; файлы
+# по хэшу содержимого кэшируются на год.
+MEDIA_CACHE_MAX_AGE = 60 * 60
+# Отдача файлов прокси: None, 'x-sendfile' (Apache, lighttpd) или
+# 'x-accel-redirect' (nginx, internal-location на MEDIA_ROOT по префиксу).
+MEDIA_SENDFILE = os.getenv('MEDIA_SENDFILE') or None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Загрузки хранятся под хэшем содержимого (core/storage.py); старые
+# файлы переносит команда migrate_media_storage.
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+# Столько секунд после записи или повторной загрузки файл не удаляется,
+# даже если ссылок на него не видно: их транзакция могла не закончиться.
+CONTENT_STORAGE_GRACE_SECONDS = 10 * 60
+
+# Уменьшенные варианты картинок постов (blog.images). Отсутствующие
+# создаёт представление blog:thumbnail. Готовые отдаёт media_view, поэтому
+# THUMBNAIL_ROOT и THUMBNAIL_URL должны лежать внутри MEDIA_ROOT и MEDIA_URL.
+THUMBNAIL_ROOT = MEDIA_ROOT / 'thumbs'
+THUMBNAIL_URL = MEDIA_URL + 'thumbs/'
+
+# Фоновая очередь заданий в базе (core/jobs.py), воркер — run_jobs.
+# Очередь: сколько её заданий выполняется одновременно на все процессы.
+JOB_QUEUES = {
+    'default': 4,
+    'images': 2,
+    'email': 1,
+}
+JOB_POLL_INTERVAL = 1
+# Пауза перед повтором упавшего задания, удваивается с каждой попыткой.
+JOB_RETRY_DELAY = 30
+# Воркер продлевает выполняющееся задание с этим интервалом, секунды;
+# задание, не продлённое за JOB_TIMEOUT, считается брошенным воркером.
+JOB_HEARTBEAT_INTERVAL = 60
+JOB_TIMEOUT = 600
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# Курсорная пагинация лент (?after=/?before=) вместо ?page=N:
+# без COUNT(*) и OFFSET, но и без номеров страниц.
+BLOG_CURSOR_PAGINATION = False
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Кэш страниц для анонимов: инвалидируется сигналами при записи в модели
+# и командой publish_scheduled при наступлении отложенных публикаций,
+# таймаут лишь ограничивает время жизни забытых записей.
+BLOG_PAGE_CACHE_ENABLED = True
+BLOG_PAGE_CACHE_ALIAS = 'default'
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+BLOG_PAGE_COUNT_CACHE_TIMEOUT = BLOG_PAGE_CACHE_TIMEOUT
+
+# Замеры времени ответа (core.middleware.RequestTimingMiddleware).
+REQUEST_TIMING_ENABLED = True
+# Server-Timing для всех клиентов; персоналу и при DEBUG он отдаётся всегда.
+REQUEST_TIMING_HEADER = False
+REQUEST_TIMING_LOG_SAMPLE_RATE = 0.01
+REQUEST_TIMING_SLOW_MS = 500
+
+# Метрики для Prometheus на /metrics (core.metrics), собираются вместе
+# с замерами времени. Без METRICS_DIR видны только метрики процесса,
+# обработавшего запрос.
+METRICS_ENABLED = True
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_SECONDS = 1
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
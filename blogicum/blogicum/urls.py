@@ -17,22 +17,29 @@ Including another URLconf
 from django.urls import path, include, reverse_lazy
 
 from django.contrib import admin
+from django.contrib.auth.views import PasswordResetView
 
 from django.conf import settings
-from django.conf.urls.static import static
 from django.views.generic.edit import CreateView
 from django.urls import include, path
 
-from blog.forms import UserForm
+from blog.forms import QueuedPasswordResetForm, UserForm
+from core.views import media_view, metrics_view
 
 
 urlpatterns = [
+    path('auth/password_reset/',
+         PasswordResetView.as_view(form_class=QueuedPasswordResetForm),
+         name='password_reset'),
     path('auth/',
          include('django.contrib.auth.urls')),
     path('pages/',
          include('pages.urls', namespace='pages')),
     path('admin/',
          admin.site.urls),
+    path('metrics',
+         metrics_view,
+         name='metrics'),
     path(
         'auth/registration/',
         CreateView.as_view(
@@ -47,11 +54,15 @@ urlpatterns = [
 
 ]
 
-if settings.DEBUG:
+if 'debug_toolbar' in settings.INSTALLED_APPS:
     import debug_toolbar
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Загрузки отдаёт приложение (core/media.py) и в DEBUG, и в продакшене;
+# с MEDIA_SENDFILE сам файл отправляет прокси.
+urlpatterns += (path(f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+                     media_view,
+                     name='media'),)
 
 handler404 = 'pages.views.page_not_found'
 handler403 = 'pages.views.permission_denied'
@@ -0,0 +1,30 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'task',
+        'queue',
+        'priority',
+        'status',
+        'attempts',
+        'run_at',
+        'locked_by',
+        'created_at',
+    )
+    list_filter = ('status', 'queue')
+    search_fields = ('task',)
+    readonly_fields = ('slot', 'locked_by', 'locked_at', 'last_error')
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задания')
+    def retry(self, request, queryset):
+        queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now()
+        )
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,54 @@
+"""PostgreSQL с пулом соединений psycopg2 внутри процесса.
+
+Django закрывает соединение в конце запроса (CONN_MAX_AGE = 0), а этот
+бэкенд вместо закрытия возвращает его в пул. Размер пула задаётся ключом
+POOL настроек базы: {'MIN_SIZE': 1, 'MAX_SIZE': 10}.
+"""
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extras, pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def get_pool(self, conn_params):
+        with self._pools_lock:
+            if self.alias not in self._pools:
+                options = self.settings_dict.get('POOL', {})
+                self._pools[self.alias] = pool.ThreadedConnectionPool(
+                    options.get('MIN_SIZE', 1),
+                    options.get('MAX_SIZE', 10),
+                    **conn_params,
+                )
+            return self._pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool(conn_params).getconn()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection_pool = self._pools.get(self.alias)
+        with self.wrap_database_errors:
+            if connection_pool is None or connection_pool.closed:
+                return self.connection.close()
+            # Пул сам откатывает незавершённую транзакцию и закрывает
+            # соединение, если его состояние неизвестно.
+            connection_pool.putconn(
+                self.connection, close=bool(self.connection.closed)
+            )
@@ -0,0 +1,200 @@
+"""Фоновые задания в таблице базы данных, без внешнего брокера.
+
+Функция становится задачей через декоратор @task и ставится в очередь
+enqueue(); представление только записывает строку Job и сразу отвечает.
+Команда run_jobs забирает задания по приоритету и времени, повторяет
+упавшие с растущей паузой и держит не больше JOB_QUEUES[queue]
+одновременно выполняющихся заданий очереди на все процессы. Пока задание
+выполняется, воркер обновляет его locked_at, и release_stale() возвращает
+в очередь только задания воркеров, которые перестали это делать.
+
+Задачи ищутся в модулях tasks установленных приложений.
+"""
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class Task(NamedTuple):
+    func: Callable
+    queue: str
+    priority: int
+    max_attempts: int
+
+
+registry = {}
+
+
+def task(queue='default', priority=0, max_attempts=3, name=None):
+    """Регистрирует функцию как задачу с аргументами, пишущимися в JSON."""
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__qualname__}'
+        registry[func.task_name] = Task(func, queue, priority, max_attempts)
+        return func
+
+    return decorator
+
+
+def enqueue(func, *args, priority=None, delay=0, **kwargs):
+    """Ставит задачу в очередь и возвращает задание.
+
+    priority и delay (секунды) — параметры задания, а не задачи.
+
+    Внутри транзакции задание появится у воркера только вместе с
+    остальными её изменениями и пропадёт при откате.
+    """
+    spec = registry[func.task_name]
+    return Job.objects.create(
+        task=func.task_name,
+        queue=spec.queue,
+        priority=spec.priority if priority is None else priority,
+        max_attempts=spec.max_attempts,
+        args=list(args),
+        kwargs=kwargs,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def queue_limit(queue):
+    return settings.JOB_QUEUES.get(queue, 1)
+
+
+def claim(worker, queues=None):
+    """Забирает следующее готовое задание или возвращает None."""
+    while True:
+        job = next_ready(queues)
+        if job is None:
+            return None
+        status = take(job, worker)
+        if status is not None:
+            return job if status else None
+        # Задание забрал другой воркер, берём следующее.
+
+
+def next_ready(queues=None):
+    running = dict(
+        Job.objects.filter(status=Job.RUNNING)
+        .values_list('queue').annotate(Count('pk')).order_by()
+    )
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=timezone.now()
+    ).exclude(queue__in=[
+        queue for queue, count in running.items()
+        if count >= queue_limit(queue)
+    ])
+    if queues:
+        candidates = candidates.filter(queue__in=queues)
+    return candidates.order_by('-priority', 'run_at', 'pk').first()
+
+
+def take(job, worker):
+    """Занимает свободное место очереди под задание.
+
+    True — задание наше, False — мест нет, None — задание уже забрали.
+    """
+    busy = set(Job.objects.filter(
+        status=Job.RUNNING, queue=job.queue
+    ).values_list('slot', flat=True))
+    for slot in range(queue_limit(job.queue)):
+        if slot in busy:
+            continue
+        fields = {
+            'status': Job.RUNNING, 'slot': slot, 'locked_by': worker,
+            'locked_at': timezone.now(), 'attempts': job.attempts + 1,
+        }
+        try:
+            with transaction.atomic():
+                claimed = Job.objects.filter(
+                    pk=job.pk, status=Job.QUEUED
+                ).update(**fields)
+        except IntegrityError:
+            # Место заняли одновременно с нами, пробуем следующее.
+            continue
+        if not claimed:
+            return None
+        for name, value in fields.items():
+            setattr(job, name, value)
+        return True
+    return False
+
+
+@contextmanager
+def heartbeat(job):
+    """Обновляет locked_at задания из отдельного потока, пока оно идёт."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                try:
+                    Job.objects.filter(
+                        pk=job.pk, status=Job.RUNNING,
+                        locked_by=job.locked_by,
+                    ).update(locked_at=timezone.now())
+                except DatabaseError:
+                    logger.exception('Не удалось продлить задание %s', job)
+        finally:
+            # У потока своё соединение с базой.
+            connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run(job):
+    """Выполняет задание: удачное удаляется, упавшее ждёт повтора."""
+    spec = registry.get(job.task)
+    try:
+        if spec is None:
+            raise LookupError(f'Неизвестная задача {job.task}')
+        with heartbeat(job):
+            spec.func(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('Задание %s упало', job)
+        fail(job, traceback.format_exc(), retry=spec is not None)
+        return False
+    job.delete()
+    return True
+
+
+def fail(job, error, retry=True):
+    retry = retry and job.attempts < job.max_attempts
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.QUEUED if retry else Job.FAILED,
+        slot=None,
+        locked_by='',
+        locked_at=None,
+        last_error=error,
+        run_at=timezone.now() + timedelta(
+            seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        ),
+    )
+
+
+def release_stale(timeout=None):
+    """Возвращает в очередь задания, которые давно не продлевались."""
+    timeout = timeout or settings.JOB_TIMEOUT
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    for job in stale:
+        fail(job, f'Не завершилось за {timeout} с у {job.locked_by}')
+    return len(stale)
@@ -0,0 +1,55 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage import ContentAddressedStorage, is_content_name
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит загруженные ранее файлы в хранилище по хэшу содержимого '
+        'и обновляет ссылки на них. Одинаковые файлы сливаются в один, '
+        'старые удаляются, когда на них не остаётся ссылок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, dry_run, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError(
+                'DEFAULT_FILE_STORAGE должен быть '
+                'core.storage.ContentAddressedStorage.'
+            )
+        moved = {}
+        missing = 0
+        for model, field in default_storage.file_fields():
+            # Список, а не iterator(): SQLite плохо переносит запись в
+            # таблицу, по которой ещё идёт курсор.
+            rows = list(model._default_manager.exclude(
+                **{field.name: ''}
+            ).only('pk', field.name).order_by('pk'))
+            for obj in rows:
+                old_name = getattr(obj, field.name).name
+                if is_content_name(old_name):
+                    continue
+                if dry_run:
+                    self.stdout.write(f'{model.__name__} {obj.pk}: {old_name}')
+                    continue
+                if old_name not in moved:
+                    if not default_storage.exists(old_name):
+                        missing += 1
+                        self.stderr.write(f'Нет файла: {old_name}')
+                        continue
+                    with default_storage.open(old_name) as file:
+                        moved[old_name] = default_storage.save(
+                            old_name, file
+                        )
+                setattr(obj, field.name, moved[old_name])
+                # Через save(): сигналы модели сбросят кэш страниц и
+                # пересоздадут производные файлы вроде миниатюр.
+                obj.save(update_fields=[field.name])
+        for old_name in moved:
+            default_storage.release(old_name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {len(moved)}, не найдено: {missing}'
+        ))
@@ -0,0 +1,55 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задания фоновой очереди. Процессов можно запустить '
+        'несколько: лимиты JOB_QUEUES общие для всех. С --burst выходит, '
+        'когда готовых заданий не осталось.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='append', dest='queues',
+            help='Брать задания только из этой очереди; можно повторять.',
+        )
+        parser.add_argument('--burst', action='store_true')
+        parser.add_argument(
+            '--interval', type=float, default=settings.JOB_POLL_INTERVAL,
+            help='Пауза между проверками пустой очереди, секунды.',
+        )
+
+    def handle(self, *args, queues, burst, interval, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        if not burst:
+            # Текущее задание доделывается, новые не берутся.
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+        while not self.stopping:
+            # Как между запросами: соединение не должно жить вечно.
+            close_old_connections()
+            jobs.release_stale()
+            job = jobs.claim(worker, queues)
+            if job is None:
+                if burst:
+                    return
+                time.sleep(interval)
+                continue
+            ok = jobs.run(job)
+            self.stdout.write(
+                f'{job}: {"готово" if ok else "ошибка"}'
+                f' (попытка {job.attempts})'
+            )
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,149 @@
+"""Отдача загруженных файлов вместо django.views.static.serve.
+
+Файл читается кусками (FileResponse, wsgi.file_wrapper), поддерживаются
+один диапазон Range с If-Range и условные запросы по ETag. Имена по хэшу
+содержимого неизменяемы и кэшируются на год. Если перед приложением
+стоит nginx или Apache, MEDIA_SENDFILE передаёт им отдачу самого файла
+через X-Accel-Redirect или X-Sendfile.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, StreamingHttpResponse)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def parse_range(header, size):
+    """Диапазон (начало, конец) включительно или None — весь файл.
+
+    Несколько диапазонов и синтаксически неверный заголовок по RFC 9110
+    можно игнорировать. ValueError — диапазон целиком за концом файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not size or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N: последние N байт.
+        if not int(end):
+            raise ValueError(header)
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        raise ValueError(header)
+    if end < start:
+        return None
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if value is None:
+        return True
+    if value.startswith('"'):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def iter_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def sendfile_response(path, content_type):
+    mode = settings.MEDIA_SENDFILE
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+    if mode == 'x-accel-redirect':
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        if relative.startswith(os.pardir):
+            return None
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX
+            + relative.replace(os.sep, '/')
+        )
+        return response
+    return None
+
+
+def file_response(request, path, content_type, size, etag, last_modified):
+    # Диапазоны прокси разбирает сам.
+    response = sendfile_response(path, content_type)
+    if response is not None:
+        return response
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_matches(
+            request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    file = open(path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        iter_range(file, start, end - start + 1),
+        status=206, content_type=content_type,
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def serve(request, storage, name, immutable=False, content_type=None,
+          max_age=None):
+    """Ответ с файлом name из файлового хранилища storage."""
+    path = storage.path(name)
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    content_type = (
+        content_type or mimetypes.guess_type(path)[0]
+        or 'application/octet-stream'
+    )
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    ) or file_response(
+        request, path, content_type, stat.st_size, etag, last_modified
+    )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True,
+            max_age=max_age or settings.MEDIA_CACHE_MAX_AGE,
+        )
+    return response
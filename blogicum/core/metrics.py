@@ -0,0 +1,238 @@
+"""Метрики процесса: счётчики и гистограммы с фиксированными корзинами.
+
+Каждый процесс копит значения в памяти и не чаще раза в
+METRICS_FLUSH_SECONDS сбрасывает снимок в METRICS_DIR/<pid>-<старт>.json:
+процесс с повторно выданным pid пишет свой файл и не затирает чужие
+итоги. Эндпоинт /metrics складывает снимки всех процессов, так что
+воркеры gunicorn видны одной таблицей. Снимки завершившихся процессов
+прибавляются к archive.json и удаляются, поэтому счётчики не уменьшаются.
+Живость процесса проверяется по pid: каталог не должен быть общим для
+нескольких машин.
+"""
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+ARCHIVE_NAME = 'archive.json'
+SNAPSHOT_RE = re.compile(r'^(\d+)-\d+\.json$')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HELP = {
+    'blogicum_requests_total': 'Число ответов.',
+    'blogicum_request_duration_seconds': 'Время ответа.',
+    'blogicum_db_queries_total': 'Число SQL-запросов.',
+    'blogicum_db_duration_seconds_total': 'Суммарное время SQL-запросов.',
+}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.last_flush = 0.0
+        self.pid = None
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            buckets, total, count = self.histograms.get(
+                key, ([0] * len(LATENCY_BUCKETS), 0.0, 0)
+            )
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    buckets[index] += 1
+                    break
+            self.histograms[key] = (buckets, total + value, count + 1)
+
+    def snapshot(self):
+        with self.lock:
+            return as_snapshot(self.counters, self.histograms)
+
+    def flush(self, force=False):
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+                not force
+                and now - self.last_flush < settings.METRICS_FLUSH_SECONDS):
+            return
+        self.last_flush = now
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        write_json(directory / self.file_name(), self.snapshot())
+
+    def file_name(self):
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid, self.started = pid, time.time_ns()
+        return f'{pid}-{self.started}.json'
+
+
+def write_json(path, data):
+    # Пишем во временный файл и переименовываем: читатель не увидит
+    # недописанный снимок.
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(data, file)
+    os.replace(tmp_name, path)
+
+
+registry = Registry()
+
+
+def record_request(request, response, timing):
+    match = request.resolver_match
+    labels = {
+        'route': match.view_name if match else 'unmatched',
+        'status': str(response.status_code),
+        'cache': getattr(request, 'page_cache_status', 'none'),
+    }
+    registry.inc('blogicum_requests_total', labels)
+    registry.observe(
+        'blogicum_request_duration_seconds', labels, timing.total_ms / 1000
+    )
+    route = {'route': labels['route']}
+    registry.inc('blogicum_db_queries_total', route, timing.queries)
+    registry.inc(
+        'blogicum_db_duration_seconds_total', route, timing.db_ms / 1000
+    )
+    registry.flush()
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_snapshots(directory, own):
+    """Снимки других процессов; снимки завершившихся уходят в архив.
+
+    Всё под блокировкой: одновременный сбор не должен увидеть снимок
+    и в архиве, и отдельным файлом или не увидеть его вовсе.
+    """
+    with open(directory / 'archive.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        snapshots, dead = [], []
+        for path in directory.glob('*.json'):
+            match = SNAPSHOT_RE.match(path.name)
+            if match and not process_alive(int(match.group(1))):
+                dead.append(path)
+            elif match and path.name != own:
+                snapshots.append(json.loads(path.read_text()))
+        archive = directory / ARCHIVE_NAME
+        archived = []
+        if archive.exists():
+            archived.append(json.loads(archive.read_text()))
+        if dead:
+            archived = [as_snapshot(*merge(
+                archived + [json.loads(path.read_text()) for path in dead]
+            ))]
+            write_json(archive, archived[0])
+            for path in dead:
+                path.unlink()
+    return snapshots + archived
+
+
+def collect():
+    """Снимки всех процессов, сложенные в один."""
+    registry.flush(force=True)
+    snapshots = [registry.snapshot()]
+    if settings.METRICS_DIR:
+        snapshots += read_snapshots(
+            Path(settings.METRICS_DIR), registry.file_name()
+        )
+    return merge(snapshots)
+
+
+def as_snapshot(counters, histograms):
+    return {
+        'counters': [
+            [name, labels, value]
+            for (name, labels), value in counters.items()
+        ],
+        'histograms': [
+            [name, labels, list(buckets), total, count]
+            for (name, labels), (buckets, total, count)
+            in histograms.items()
+        ],
+    }
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, buckets, total, count in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged, merged_total, merged_count = histograms.get(
+                key, ([0] * len(LATENCY_BUCKETS), 0.0, 0)
+            )
+            histograms[key] = (
+                [a + b for a, b in zip(merged, buckets)],
+                merged_total + total, merged_count + count,
+            )
+    return counters, histograms
+
+
+def _escape(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def _labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(counters, histograms):
+    """Текстовый формат экспозиции Prometheus."""
+    lines = []
+    by_name = defaultdict(list)
+    for (name, labels), value in sorted(counters.items()):
+        by_name[name].append(f'{name}{_labels(labels)} {_number(value)}')
+    for name, samples in by_name.items():
+        lines += [f'# HELP {name} {HELP.get(name, name)}',
+                  f'# TYPE {name} counter', *samples]
+    by_name = defaultdict(list)
+    for (name, labels), (buckets, total, count) in sorted(
+            histograms.items()):
+        cumulative = 0
+        for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+            cumulative += bucket
+            by_name[name].append(
+                f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+            )
+        by_name[name] += [
+            f'{name}_bucket{_labels(labels, le="+Inf")} {count}',
+            f'{name}_sum{_labels(labels)} {_number(total)}',
+            f'{name}_count{_labels(labels)} {count}',
+        ]
+    for name, samples in by_name.items():
+        lines += [f'# HELP {name} {HELP.get(name, name)}',
+                  f'# TYPE {name} histogram', *samples]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,197 @@
+import json
+import logging
+import mimetypes
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+
+from . import media, metrics
+from .routers import PIN_COOKIE_NAME
+from .timing import RequestTiming
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+# Кодировки сжатых копий статики в порядке предпочтения.
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+timing_logger = logging.getLogger('core.timing')
+
+
+class PrimaryPinMiddleware:
+    """После записи на время отставания реплик читаем из основной базы."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (settings.DATABASE_REPLICAS
+                and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class RequestTimingMiddleware:
+    """Время ответа по частям: в заголовке Server-Timing и в журнале.
+
+    Заголовок получают персонал и все при DEBUG или REQUEST_TIMING_HEADER.
+    Стоит первым в MIDDLEWARE, чтобы total включал остальные middleware.
+    Время SQL входит и во время представления, и во время шаблонов.
+    В журнал попадает доля REQUEST_TIMING_LOG_SAMPLE_RATE запросов
+    и все запросы дольше REQUEST_TIMING_SLOW_MS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_TIMING_ENABLED:
+            return self.get_response(request)
+        timing = request.timing = RequestTiming()
+        token = timing.activate()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            timing.deactivate(token)
+        timing.finish()
+        if settings.METRICS_ENABLED:
+            metrics.record_request(request, response, timing)
+        if self.show_server_timing(request):
+            response['Server-Timing'] = self.server_timing(timing)
+        if (timing.total_ms >= settings.REQUEST_TIMING_SLOW_MS
+                or random.random() < settings.REQUEST_TIMING_LOG_SAMPLE_RATE):
+            timing_logger.info(self.log_line(request, response, timing))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, 'timing', None)
+        if timing is not None:
+            timing.view_started = time.perf_counter()
+
+    @staticmethod
+    def show_server_timing(request):
+        # Время SQL и число запросов — подсказка для атаки по времени,
+        # посторонним их не показываем.
+        user = getattr(request, 'user', None)
+        return (
+            settings.REQUEST_TIMING_HEADER or settings.DEBUG
+            or bool(user and user.is_staff)
+        )
+
+    @staticmethod
+    def server_timing(timing):
+        return ', '.join([
+            f'total;dur={timing.total_ms:.1f}',
+            f'view;dur={timing.view_ms:.1f}',
+            f'db;dur={timing.db_ms:.1f};desc="{timing.queries} queries"',
+            f'tpl;dur={timing.template_ms:.1f}',
+        ])
+
+    @staticmethod
+    def log_line(request, response, timing):
+        match = request.resolver_match
+        return json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(timing.total_ms, 1),
+            'view_ms': round(timing.view_ms, 1),
+            'db_ms': round(timing.db_ms, 1),
+            'queries': timing.queries,
+            'template_ms': round(timing.template_ms, 1),
+            'bytes': None if response.streaming else len(response.content),
+        }, ensure_ascii=False)
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticMiddleware:
+    """Статика из STATIC_ROOT со сжатыми заранее копиями.
+
+    Копию .br или .gz выбирает Accept-Encoding. Файлы с хэшем в имени
+    из манифеста кэшируются навсегда, остальные — на
+    STATIC_CACHE_MAX_AGE. При DEBUG статику отдаёт runserver.
+    """
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.hashed_names = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD')
+                and request.path.startswith(settings.STATIC_URL)):
+            response = self.serve(
+                request, request.path[len(settings.STATIC_URL):]
+            )
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            if not os.path.isfile(staticfiles_storage.path(name)):
+                return None
+        except SuspiciousFileOperation:
+            return None
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        options = {
+            'immutable': name in self.hashed_names,
+            'content_type': mimetypes.guess_type(name)[0],
+            'max_age': settings.STATIC_CACHE_MAX_AGE,
+        }
+        for encoding, suffix in STATIC_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                response = media.serve(
+                    request, staticfiles_storage, name + suffix, **options
+                )
+            except Http404:
+                continue
+            response['Content-Encoding'] = encoding
+            break
+        else:
+            response = media.serve(
+                request, staticfiles_storage, name, **options
+            )
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
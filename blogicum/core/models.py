@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class PublishedModel(models.Model):
@@ -24,3 +25,78 @@ class CreatedAtModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Job(CreatedAtModel):
+    """Задание фоновой очереди (core.jobs), выполняемое run_jobs."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(max_length=200, verbose_name='Задача')
+    queue = models.CharField(
+        max_length=50, default='default', verbose_name='Очередь'
+    )
+    priority = models.SmallIntegerField(
+        default=0,
+        verbose_name='Приоритет',
+        help_text='Задания с большим приоритетом выполняются раньше.'
+    )
+    args = models.JSONField(default=list, verbose_name='Аргументы')
+    kwargs = models.JSONField(
+        default=dict, verbose_name='Именованные аргументы'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3, verbose_name='Наибольшее число попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Выполнить не раньше'
+    )
+    # Номер места в лимите параллельности очереди, занятого заданием.
+    slot = models.PositiveSmallIntegerField(null=True, blank=True)
+    locked_by = models.CharField(
+        max_length=100, blank=True, verbose_name='Воркер'
+    )
+    locked_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Начато'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        verbose_name = 'задание'
+        verbose_name_plural = 'Задания'
+        ordering = ('-priority', 'run_at', 'pk')
+        indexes = (
+            models.Index(
+                fields=('queue', '-priority', 'run_at'),
+                condition=models.Q(status='queued'),
+                name='job_queued_idx',
+            ),
+        )
+        constraints = (
+            # Выполняющиеся задания очереди занимают разные места, так что
+            # лимит параллельности держится между процессами без блокировок.
+            models.UniqueConstraint(
+                fields=('queue', 'slot'),
+                condition=models.Q(status='running'),
+                name='job_running_slot_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
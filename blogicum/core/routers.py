@@ -0,0 +1,42 @@
+"""Маршрутизация чтения на реплики и записи на основную базу.
+
+Представления, которым достаточно реплики, выполняются внутри
+replica_reads(); всё остальное, включая чтение после записи, идёт
+в 'default'. Реплика выбирается одна на весь блок: реплики отстают
+по-разному, и список со своим числом страниц не должен разойтись.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY_DB = 'default'
+PIN_COOKIE_NAME = 'db_primary_pin'
+
+_replica = ContextVar('replica', default=None)
+
+
+@contextmanager
+def replica_reads():
+    replicas = settings.DATABASE_REPLICAS
+    if _replica.get() or not replicas:
+        yield
+        return
+    token = _replica.set(random.choice(replicas))
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _replica.get() or PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
@@ -0,0 +1,22 @@
+"""Прагмы SQLite, применяемые к каждому новому соединению.
+
+Значения берутся из settings.SQLITE_PRAGMAS. Вместе с CONN_MAX_AGE
+соединение и его настройки переживают отдельный запрос.
+"""
+import re
+
+from django.conf import settings
+
+PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE_RE = re.compile(r'^[-\w]+$')
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        value = str(value)
+        if not (PRAGMA_NAME_RE.match(name) and PRAGMA_VALUE_RE.match(value)):
+            raise ValueError(f'Некорректная прагма SQLite: {name}={value}')
+        # Напрямую через драйвер: прагмы не должны попадать в логи запросов.
+        connection.connection.execute(f'PRAGMA {name} = {value}')
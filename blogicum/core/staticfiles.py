@@ -0,0 +1,56 @@
+"""Хранилище collectstatic с хэшами в именах и сжатыми копиями.
+
+Рядом с каждым файлом с хэшем в имени кладутся .gz и, если установлен
+пакет brotli, .br. PrecompressedStaticMiddleware выбирает копию по
+Accept-Encoding, так что на запрос файл не сжимается.
+"""
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.json', '.map', '.xml', '.ico',
+)
+# Сжатая копия нужна, только если она заметно меньше оригинала.
+MAX_COMPRESSED_RATIO = 0.95
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if self.should_compress(name):
+                self.compress(name)
+
+    def should_compress(self, name):
+        return (
+            name.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+            and self.size(name) >= settings.STATIC_COMPRESS_MIN_SIZE
+        )
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            if len(compressed) < len(data) * MAX_COMPRESSED_RATIO:
+                self._save(target, ContentFile(compressed))
@@ -0,0 +1,132 @@
+"""Хранилище загрузок, адресуемое содержимым.
+
+Файл сохраняется под sha256 своего содержимого: ab/cd/abcd…ef.jpg.
+Повторная загрузка той же фотографии не пишет второй копии, а два уровня
+каталогов держат их размер небольшим. Ссылки на файл считаются по полям
+моделей, хранящих файлы здесь: release() удаляет файл, когда их не
+осталось. Повторная загрузка обновляет время изменения файла, и
+release() не трогает файлы моложе CONTENT_STORAGE_GRACE_SECONDS: ссылка
+на такой файл может ещё лежать в незакоммиченной транзакции.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+
+HASH_CHUNK_SIZE = 64 * 1024
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+
+def content_name(digest, original_name):
+    shards = [
+        digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH]
+        for i in range(SHARD_DEPTH)
+    ]
+    extension = PurePosixPath(original_name).suffix.lower()
+    return str(PurePosixPath(*shards, digest + extension))
+
+
+def is_content_name(name):
+    path = PurePosixPath(name)
+    digest = path.stem
+    return (
+        len(path.parts) == SHARD_DEPTH + 1
+        and len(digest) == 64
+        and content_name(digest, name) == name
+    )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save, суффиксы не нужны.
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        os.makedirs(self.location, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+                dir=self.location, delete=False) as tmp:
+            try:
+                for chunk in content.chunks(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            except BaseException:
+                os.remove(tmp.name)
+                raise
+        name = content_name(digest.hexdigest(), name)
+        path = self.path(name)
+        try:
+            # Такое содержимое уже есть: вторая копия не нужна. Время
+            # изменения защищает файл от release() до коммита новой ссылки.
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        else:
+            os.remove(tmp.name)
+            return name
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # NamedTemporaryFile создаёт файл с правами 0600.
+        os.chmod(tmp.name, self.file_permissions_mode or 0o644)
+        # Одновременная загрузка того же файла перезапишет его тем же.
+        os.replace(tmp.name, path)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        if not is_content_name(name):
+            return
+        # Опустевшие каталоги шардов больше не нужны.
+        parent = os.path.dirname(self.path(name))
+        for _ in range(SHARD_DEPTH):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+    def file_fields(self):
+        return [
+            (model, field)
+            for model in apps.get_models()
+            for field in model._meta.concrete_fields
+            if isinstance(field, FileField)
+            and isinstance(field.storage, ContentAddressedStorage)
+            and field.storage.location == self.location
+        ]
+
+    def is_referenced(self, name):
+        # Поля с файлами должны быть проиндексированы: проверка идёт при
+        # каждом удалении и замене файла.
+        return any(
+            model._default_manager.filter(**{field.name: name}).exists()
+            for model, field in self.file_fields()
+        )
+
+    def recently_saved(self, name):
+        try:
+            mtime = os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return time.time() - mtime < settings.CONTENT_STORAGE_GRACE_SECONDS
+
+    def release(self, name):
+        """Удаляет файл, если на него больше не ссылается ни одна запись.
+
+        True — файл удалён, False — ссылки есть, None — файл сохранён
+        недавно, и проверку нужно повторить позже.
+        """
+        if not name or self.is_referenced(name):
+            return False
+        # Старые имена не по хэшу повторная загрузка получить не может.
+        if is_content_name(name) and self.recently_saved(name):
+            return None
+        self.delete(name)
+        return True
@@ -0,0 +1,78 @@
+"""Замеры времени обработки запроса: SQL, шаблоны, представление.
+
+Текущий замер хранится в contextvar, поэтому обёртка execute_wrapper
+и бэкенд шаблонов находят его без передачи request.
+"""
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self._template_depth = 0
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+
+    def finish(self):
+        finished = time.perf_counter()
+        self.total_ms = (finished - self.started) * 1000
+        if self.view_started is not None:
+            # Отрисовка шаблонов и SQL внутри неё считаются отдельно.
+            self.view_ms = max(
+                (finished - self.view_started) * 1000 - self.template_ms, 0
+            )
+
+
+def current_timing():
+    return _current.get()
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timing = current_timing()
+        if timing is None:
+            return super().render(context, request)
+        # Вложенный render_to_string внутри шаблона не считаем дважды.
+        timing._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing._template_depth -= 1
+            if not timing._template_depth:
+                timing.template_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, отдающий время отрисовки в замер запроса."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,56 @@
+import hmac
+import os
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+
+from . import media, metrics
+from .storage import is_content_name
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def has_metrics_access(request):
+    """Доступ у персонала и у сборщика с токеном METRICS_TOKEN."""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+def metrics_view(request):
+    if not has_metrics_access(request):
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.render(*metrics.collect()),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+def is_immutable_media(path):
+    """Файл по хэшу содержимого или вариант такого файла (blog.images)."""
+    if is_content_name(path):
+        return True
+    thumbs = os.path.relpath(settings.THUMBNAIL_ROOT, settings.MEDIA_ROOT)
+    if thumbs.startswith(os.pardir):
+        return False
+    prefix = tuple(thumbs.split(os.sep))
+    parts = PurePosixPath(path).parts
+    # Вариант лежит в <каталог вариантов>/<имя оригинала>/<ширина>.<формат>.
+    return (
+        parts[:len(prefix)] == prefix
+        and is_content_name('/'.join(parts[len(prefix):-1]))
+    )
+
+
+@require_safe
+def media_view(request, path):
+    # Имя по хэшу содержимого никогда не указывает на другой файл.
+    return media.serve(
+        request, default_storage, path, immutable=is_immutable_media(path)
+    )
@@ -0,0 +1,75 @@
+"""Бюджеты стоимости запросов: число SQL-запросов и время ответа.
+
+Использование:
+
+    with QueryBudget('blog:index', max_queries=5, max_ms=300):
+        client.get('/')
+
+При превышении бюджета сообщение об ошибке содержит «отпечатки» запросов
+(SQL без литералов), сгруппированные по числу повторений, — так N+1
+видно сразу.
+
+Время зависит от машины, поэтому проверяется, только если задана
+переменная окружения BUDGET_TIME_FACTOR — множитель бюджетов времени.
+"""
+import os
+import re
+import time
+from collections import Counter
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+TIME_FACTOR = os.environ.get('BUDGET_TIME_FACTOR')
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\?, )*\?\)')
+_SPACES_RE = re.compile(r'\s+')
+_SAVEPOINT_RE = re.compile(r'"s\d+_x\d+"')
+
+
+def fingerprint(sql: str) -> str:
+    """SQL-запрос без литералов: одинаковые по форме запросы совпадают."""
+    result = _SAVEPOINT_RE.sub('"?"', sql)
+    result = _STRING_RE.sub('?', result)
+    result = _NUMBER_RE.sub('?', result)
+    result = _IN_LIST_RE.sub('IN (...)', result)
+    return _SPACES_RE.sub(' ', result).strip()
+
+
+class QueryBudget:
+    def __init__(self, name: str, max_queries: int, max_ms: float):
+        self.name = name
+        self.max_queries = max_queries
+        self.max_ms = max_ms * float(TIME_FACTOR) if TIME_FACTOR else None
+        self._queries = CaptureQueriesContext(connection)
+
+    def __enter__(self):
+        self._queries.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed_ms = (time.perf_counter() - self._started) * 1000
+        self._queries.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        self.n_queries = n_queries = len(self._queries)
+        assert n_queries <= self.max_queries, (
+            f"Страница `{self.name}` выполнила {n_queries} SQL-запросов при"
+            f" бюджете {self.max_queries}.\n{self.report()}"
+        )
+        assert self.max_ms is None or self.elapsed_ms <= self.max_ms, (
+            f"Страница `{self.name}` отвечала {self.elapsed_ms:.0f} мс при"
+            f" бюджете {self.max_ms:.0f} мс.\n{self.report()}"
+        )
+
+    def report(self) -> str:
+        counts = Counter(
+            fingerprint(query['sql'])
+            for query in self._queries.captured_queries
+        )
+        return '\n'.join(
+            f'{count:>4} × {sql}' for sql, count in counts.most_common()
+        )
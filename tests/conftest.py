@@ -41,6 +41,22 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    # Загрузки и их варианты не должны копиться в media между прогонами.
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.THUMBNAIL_ROOT = settings.MEDIA_ROOT / 'thumbs'
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,121 @@
+import pytest
+
+
+@pytest.fixture
+def admin_posts(mixer, admin_user, published_locations, published_category):
+    return mixer.cycle(3).blend(
+        'blog.Post',
+        author=mixer.sequence(*mixer.cycle(3).blend('auth.User')),
+        category=published_category,
+        location=mixer.sequence(*published_locations),
+    )
+
+
+@pytest.mark.django_db
+def test_post_changelist_queries_do_not_grow_with_rows(
+        admin_client, admin_posts, django_assert_max_num_queries
+):
+    # Сессия, пользователь, два подсчёта, строки и категории для фильтра;
+    # виджеты связанных полей не должны добавлять запросов на строку.
+    with django_assert_max_num_queries(6):
+        response = admin_client.get('/admin/blog/post/')
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert 'admin-autocomplete' in content, (
+        "Убедитесь, что для автора, местоположения и категории в списке"
+        " публикаций используются поля с автодополнением."
+    )
+    for post in admin_posts:
+        assert post.author.username in content
+
+
+@pytest.mark.django_db
+def test_post_changelist_autocomplete_endpoint(admin_client, admin_posts):
+    author = admin_posts[0].author
+    response = admin_client.get(
+        '/admin/autocomplete/',
+        {'term': author.username, 'app_label': 'blog',
+         'model_name': 'post', 'field_name': 'author'},
+    )
+    assert response.status_code == 200
+    assert str(author.pk) in {
+        item['id'] for item in response.json()['results']
+    }
+
+
+@pytest.mark.django_db
+def test_category_change_page_paginates_posts(
+        admin_client, mixer, user, published_category,
+        django_assert_max_num_queries
+):
+    mixer.cycle(45).blend(
+        'blog.Post', author=user, category=published_category
+    )
+    url = f'/admin/blog/category/{published_category.id}/change/'
+    # Число запросов не зависит от числа публикаций: сессия, пользователь,
+    # категория, подсчёт, страница строк и служебные запросы админки.
+    with django_assert_max_num_queries(10):
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert '1–20 из 45' in content, (
+        "Убедитесь, что на странице категории публикации выводятся"
+        " постранично со сводкой по их числу."
+    )
+    assert content.count('inlinechangelink') == 20
+
+    response = admin_client.get(url, {'posts_page': 3})
+    assert '41–45 из 45' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_category_inline_saves_submitted_rows(
+        admin_client, mixer, user, published_category
+):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from blog.models import Post
+
+    mixer.cycle(25).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    url = f'/admin/blog/category/{published_category.id}/change/'
+    formset = admin_client.get(url).context['inline_admin_formsets'][
+        0].formset
+    shown = [form.instance for form in formset.forms]
+    prefix = formset.prefix
+    data = {
+        'title': published_category.title,
+        'description': published_category.description,
+        'slug': published_category.slug,
+        'is_published': 'on',
+        f'{prefix}-TOTAL_FORMS': len(shown),
+        f'{prefix}-INITIAL_FORMS': len(shown),
+        f'{prefix}-MIN_NUM_FORMS': 0,
+        f'{prefix}-MAX_NUM_FORMS': 1000,
+    }
+    for index, post in enumerate(shown):
+        data[f'{prefix}-{index}-id'] = post.pk
+        data[f'{prefix}-{index}-category'] = published_category.pk
+        if index < len(shown) - 1:
+            data[f'{prefix}-{index}-is_published'] = 'on'
+    # Пока форма была открыта, в начало страницы встал новый пост, и
+    # последняя строка формы ушла на следующую страницу.
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(days=1),
+    )
+    response = admin_client.post(url, data)
+    assert response.status_code == 302, (
+        "Убедитесь, что сдвиг страницы публикаций не ломает сохранение."
+    )
+    unpublished = set(Post.objects.filter(
+        category=published_category, is_published=False
+    ).values_list('pk', flat=True))
+    assert unpublished == {shown[-1].pk}, (
+        "Убедитесь, что флаг публикации меняется у тех постов, что были "
+        "показаны в форме."
+    )
@@ -0,0 +1,144 @@
+from io import BytesIO
+from typing import Callable, NamedTuple
+
+import pytest
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import get_resolver
+from PIL import Image
+
+from blog.models import Post
+from budget import QueryBudget
+from conftest import N_PER_PAGE
+
+N_BUDGET_PAGES = 5
+N_BUDGET_COMMENTS = 50
+
+
+class Budget(NamedTuple):
+    url: Callable
+    max_queries: int
+    max_ms: float
+    method: str = 'get'
+    data: dict = None
+
+
+@pytest.fixture
+def budget_data(mixer, user, another_user, published_category,
+                published_locations):
+    def blend_rows(post=None):
+        posts = mixer.cycle(N_PER_PAGE * N_BUDGET_PAGES).blend(
+            'blog.Post',
+            author=user,
+            category=published_category,
+            location=mixer.sequence(*published_locations),
+        )
+        comments = mixer.cycle(N_BUDGET_COMMENTS).blend(
+            'blog.Comment',
+            post=post or posts[0],
+            author=mixer.sequence(user, another_user),
+        )
+        return posts[0], comments[0]
+
+    post, comment = blend_rows()
+    buffer = BytesIO()
+    Image.new('RGB', (1200, 800), 'teal').save(buffer, 'JPEG')
+    image = default_storage.save('budget.jpg', ContentFile(buffer.getvalue()))
+    # Без сигналов: варианты создаст сам запрос к миниатюре.
+    Post.objects.filter(pk=post.pk).update(image=image)
+    # Вторая порция строк удваивает данные: число запросов не должно
+    # от этого измениться.
+    yield {'post': post, 'comment': comment, 'user': user,
+           'image': image, 'grow': lambda: blend_rows(post)}
+    default_storage.delete(image)
+
+
+# Бюджет включает два запроса на сессию и пользователя и меряется с
+# пустым кэшем. Время в мс проверяется только с BUDGET_TIME_FACTOR.
+BUDGETS = {
+    'blog:index': Budget(lambda data: '/', 5, 300),
+    'blog:category_posts': Budget(
+        lambda data: f'/category/{data["post"].category.slug}/', 6, 300
+    ),
+    'blog:profile': Budget(
+        lambda data: f'/profile/{data["user"].username}/', 6, 300
+    ),
+    'blog:post_detail': Budget(
+        lambda data: f'/posts/{data["post"].id}/', 5, 300
+    ),
+    'blog:post_comments': Budget(
+        lambda data: f'/posts/{data["post"].id}/comments/', 5, 300
+    ),
+    'blog:create_post': Budget(lambda data: '/posts/create/', 4, 300),
+    'blog:edit_post': Budget(
+        lambda data: f'/posts/{data["post"].id}/edit/', 5, 300
+    ),
+    'blog:delete_post': Budget(
+        lambda data: f'/posts/{data["post"].id}/delete/', 4, 300
+    ),
+    'blog:add_comment': Budget(
+        lambda data: f'/posts/{data["post"].id}/comment/', 9, 300,
+        method='post', data={'text': 'Комментарий в рамках бюджета'},
+    ),
+    'blog:edit_comment': Budget(
+        lambda data: (
+            f'/posts/{data["post"].id}/edit_comment/{data["comment"].id}/'
+        ), 3, 300
+    ),
+    'blog:delete_comment': Budget(
+        lambda data: (
+            f'/posts/{data["post"].id}/delete_comment/{data["comment"].id}/'
+        ), 3, 300
+    ),
+    'blog:edit_profile': Budget(lambda data: '/user/', 2, 300),
+    'blog:search': Budget(
+        lambda data: f'/search/?q={data["post"].title[:3]}', 3, 300
+    ),
+    'blog:thumbnail': Budget(
+        lambda data: f'/thumbs/640/webp/{data["image"]}', 2, 300
+    ),
+}
+
+
+def test_every_blog_url_has_budget():
+    resolver = get_resolver()
+    blog_names = {
+        f'blog:{name}'
+        for name in resolver.namespace_dict['blog'][1].reverse_dict
+        if isinstance(name, str)
+    }
+    missing = blog_names - set(BUDGETS)
+    assert not missing, (
+        "Задайте бюджет запросов и времени для адресов: "
+        f"{', '.join(sorted(missing))}."
+    )
+
+
+def measure(name, client, data):
+    budget = BUDGETS[name]
+    url = budget.url(data)
+    request = getattr(client, budget.method)
+    # Первый запрос прогревает только шаблоны: кэши карточек и числа
+    # страниц сбрасываем, иначе они спрячут N+1 и потерянный
+    # select_related.
+    request(url, budget.data)
+    for cache in caches.all():
+        cache.clear()
+    with QueryBudget(name, budget.max_queries, budget.max_ms) as measured:
+        response = request(url, budget.data)
+    assert response.status_code in (200, 302), (
+        f"Убедитесь, что страница `{name}` отвечает без ошибок."
+    )
+    return measured.n_queries
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', BUDGETS)
+def test_url_within_budget(name, user_client, budget_data):
+    n_queries = measure(name, user_client, budget_data)
+    budget_data['grow']()
+    assert measure(name, user_client, budget_data) == n_queries, (
+        f"Убедитесь, что число SQL-запросов страницы `{name}` не растёт "
+        "вместе с числом постов и комментариев."
+    )
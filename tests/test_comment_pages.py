@@ -0,0 +1,47 @@
+import re
+from http import HTTPStatus
+
+import pytest
+
+N_COMMENTS = 45
+
+
+@pytest.mark.django_db
+def test_comments_loaded_in_batches(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(N_COMMENTS).blend('blog.Comment', post=post)
+    url = f'/posts/{post.id}/'
+    seen = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        batch = list(response.context['comments'])
+        assert len(batch) <= 20, (
+            "Убедитесь, что комментарии выводятся порциями, а не все сразу."
+        )
+        seen.extend(comment.id for comment in batch)
+        more = re.search(
+            r'href="(/posts/\d+/comments/\?after=[^"]+)"',
+            response.content.decode(),
+        )
+        url = more.group(1) if more else None
+    assert seen == [comment.id for comment in comments], (
+        "Убедитесь, что по ссылке «Показать ещё» подгружаются следующие"
+        " комментарии без пропусков и повторов."
+    )
+
+
+@pytest.mark.django_db
+def test_comments_fragment_hidden_for_unpublished_post(
+        client, mixer, user, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False,
+    )
+    response = client.get(f'/posts/{post.id}/comments/')
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что комментарии снятого с публикации поста недоступны."
+    )
@@ -0,0 +1,87 @@
+import pytest
+
+
+@pytest.mark.django_db
+def test_post_detail_not_modified(
+        client, django_assert_num_queries, user,
+        post_with_published_location, django_capture_on_commit_callbacks):
+    url = f'/posts/{post_with_published_location.id}/'
+    response = client.get(url)
+    etag = response['ETag']
+    assert etag and response['Last-Modified'], (
+        "Убедитесь, что страница поста отдаёт заголовки `ETag` и "
+        "`Last-Modified`."
+    )
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, (
+        "Убедитесь, что неизменённая страница поста отвечает 304 без "
+        "запросов к базе данных."
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_published_location.comments.create(
+            author=user, text='Новый'
+        )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and response['ETag'] != etag, (
+        "Убедитесь, что новый комментарий меняет `ETag` страницы поста."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_not_modified_since(client, post_with_published_location):
+    response = client.get('/')
+    response = client.get(
+        '/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert response.status_code == 304, (
+        "Убедитесь, что лента отвечает 304 на `If-Modified-Since`."
+    )
+
+
+@pytest.mark.django_db
+def test_hidden_post_not_revalidated(
+        client, user_client, unpublished_posts_with_published_locations):
+    url = f'/posts/{unpublished_posts_with_published_locations[0].id}/'
+    etag = user_client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 404, (
+        "Убедитесь, что снятый с публикации пост не отдаётся другим "
+        "пользователям даже по `ETag` автора."
+    )
+
+
+@pytest.mark.django_db
+def test_modified_since_after_post_edit(
+        client, post_with_published_location,
+        django_capture_on_commit_callbacks):
+    last_modified = client.get('/')['Last-Modified']
+    post_with_published_location.title = 'Исправленный заголовок'
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_published_location.save()
+    response = client.get('/', HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 200, (
+        "Убедитесь, что правка поста меняет `Last-Modified` ленты."
+    )
+    assert 'Исправленный заголовок' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_modified_since_after_comment_delete(
+        client, user, post_with_published_location,
+        django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        comment = post_with_published_location.comments.create(
+            author=user, text='Удаляемый'
+        )
+    url = f'/posts/{post_with_published_location.id}/'
+    last_modified = client.get(url)['Last-Modified']
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.delete()
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 200, (
+        "Убедитесь, что удаление комментария меняет `Last-Modified` "
+        "страницы поста."
+    )
+    assert 'Удаляемый' not in response.content.decode()
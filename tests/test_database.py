@@ -0,0 +1,182 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied():
+    if connection.vendor != 'sqlite':
+        pytest.skip('Прагмы применяются только к SQLite.')
+    with connection.cursor() as cursor:
+        for pragma in ('busy_timeout', 'cache_size', 'synchronous'):
+            cursor.execute(f'PRAGMA {pragma}')
+            value = cursor.fetchone()[0]
+            expected = settings.SQLITE_PRAGMAS[pragma]
+            if pragma == 'synchronous':
+                expected = {'OFF': 0, 'NORMAL': 1, 'FULL': 2}[expected]
+            assert value == expected, (
+                f"Убедитесь, что прагма `{pragma}` из SQLITE_PRAGMAS"
+                " применяется к новому соединению."
+            )
+
+
+@pytest.fixture
+def replica_db(tmp_path, settings):
+    """Вторая база SQLite в роли реплики со своими данными."""
+    from django.core.management import call_command
+    from django.db import connections
+
+    alias = 'replica'
+    connections.databases[alias] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+        'TEST': {},
+    }
+    settings.DATABASE_REPLICAS = [alias]
+    call_command('migrate', database=alias, verbosity=0)
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.databases[alias]
+
+
+def _blend_visible_post(mixer, title):
+    return mixer.blend(
+        'blog.Post', title=title, category__is_published=True,
+        location=None, is_published=True,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_router_reads_lists_from_replica(mixer, replica_db, user_client):
+    from blog.models import Post
+    from core.routers import PIN_COOKIE_NAME
+
+    _blend_visible_post(mixer, 'Пост основной базы')
+    # Пост, который есть только на реплике.
+    replica_post = _blend_visible_post(mixer, 'Пост реплики')
+    for obj in (replica_post.author, replica_post.category, replica_post):
+        obj.save(using=replica_db)
+    Post.objects.filter(pk=replica_post.pk).delete()
+
+    content = user_client.get('/').content.decode()
+    assert 'Пост реплики' in content and 'Пост основной базы' not in content, (
+        "Убедитесь, что лента читается с реплики."
+    )
+
+    response = user_client.post(
+        '/user/', {'username': 'writer', 'email': 'w@example.com'}
+    )
+    assert PIN_COOKIE_NAME in response.cookies, (
+        "Убедитесь, что после записи ответ закрепляет чтение за основной"
+        " базой."
+    )
+    content = user_client.get('/').content.decode()
+    assert 'Пост основной базы' in content, (
+        "Убедитесь, что сразу после записи страницы читаются из основной"
+        " базы."
+    )
+
+
+def test_router_sends_writes_to_primary(settings):
+    from blog.models import Post
+    from core.routers import PrimaryReplicaRouter, replica_reads
+
+    settings.DATABASE_REPLICAS = ['replica']
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Post) == 'default'
+    with replica_reads():
+        assert router.db_for_read(Post) == 'replica'
+        assert router.db_for_write(Post) == 'default'
+
+
+def test_router_keeps_one_replica_per_block(settings):
+    from blog.models import Comment, Post
+    from core.routers import PrimaryReplicaRouter, replica_reads
+
+    settings.DATABASE_REPLICAS = [f'replica{n}' for n in range(1, 9)]
+    router = PrimaryReplicaRouter()
+    for _ in range(5):
+        with replica_reads():
+            chosen = router.db_for_read(Post)
+            with replica_reads():
+                reads = {
+                    router.db_for_read(model)
+                    for model in (Post, Comment) * 10
+                }
+        assert reads == {chosen}, (
+            "Убедитесь, что все чтения одного запроса идут на одну реплику."
+        )
+        assert router.db_for_read(Post) == 'default'
+
+
+class FakePgConnection:
+    """Соединение psycopg2 без сервера: пул смотрит только на состояние."""
+
+    isolation_level = None
+
+    def __init__(self):
+        from psycopg2 import extensions
+
+        self.closed = 0
+        self.info = type('Info', (), {})()
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+    def rollback(self):
+        from psycopg2 import extensions
+
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def test_pool_reuses_returned_connections(monkeypatch):
+    psycopg2 = pytest.importorskip('psycopg2')
+    from psycopg2 import extensions
+
+    from core.backends.postgresql_pool import base
+
+    opened = []
+
+    def connect(*args, **kwargs):
+        opened.append(FakePgConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(psycopg2, 'connect', connect)
+    monkeypatch.setattr(
+        base.extras, 'register_default_jsonb', lambda **kwargs: None
+    )
+    settings_dict = {
+        **connection.settings_dict, 'OPTIONS': {},
+        'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': 2},
+    }
+    first = base.DatabaseWrapper(settings_dict, alias='pool_test')
+    second = base.DatabaseWrapper(settings_dict, alias='pool_test')
+    try:
+        first.connection = first.get_new_connection({'dbname': 'blog'})
+        second.connection = second.get_new_connection({'dbname': 'blog'})
+        assert first.connection is not second.connection
+        assert len(opened) == 2
+        reused = first.connection
+
+        first.close()
+        assert not reused.closed, (
+            "Убедитесь, что в конце запроса соединение возвращается в пул,"
+            " а не закрывается."
+        )
+        assert reused.info.transaction_status == (
+            extensions.TRANSACTION_STATUS_IDLE
+        ), "Убедитесь, что незавершённая транзакция откатывается в пуле."
+        first.connection = first.get_new_connection({'dbname': 'blog'})
+        assert first.connection is reused and len(opened) == 2, (
+            "Убедитесь, что новое соединение берётся из пула."
+        )
+
+        # Оборванное соединение пул выбрасывает и открывает новое.
+        first.connection.closed = 1
+        first.close()
+        first.connection = first.get_new_connection({'dbname': 'blog'})
+        assert first.connection is not reused and len(opened) == 3
+    finally:
+        base.DatabaseWrapper._pools.pop('pool_test').closeall()
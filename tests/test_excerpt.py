@@ -0,0 +1,31 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_excerpt_saved_and_backfilled(mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        text=' '.join(f'слово{number}' for number in range(30)),
+    )
+    assert post.excerpt.startswith('слово0 слово1') and post.excerpt.endswith(
+        '…'
+    ), "Убедитесь, что анонс поста заполняется при сохранении."
+
+    Post.objects.filter(pk=post.pk).update(excerpt='')
+    call_command('backfill_excerpts', batch_size=1)
+    post_from_db = Post.objects.get(pk=post.pk)
+    assert post_from_db.excerpt == post.excerpt, (
+        "Убедитесь, что команда `backfill_excerpts` заполняет пустые анонсы."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_does_not_load_post_text(client, post_with_published_location):
+    response = client.get('/')
+    page_posts = list(response.context['page_obj'])
+    assert page_posts and all(
+        'text' in post.get_deferred_fields() for post in page_posts
+    ), "Убедитесь, что лента не загружает полный текст постов."
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+from django.core.management import call_command
+
+from core import jobs
+from core.models import Job
+
+calls = []
+
+
+@jobs.task(name='tests.record', max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@jobs.task(name='tests.broken', max_attempts=2)
+def broken():
+    raise RuntimeError('сломано')
+
+
+@jobs.task(name='tests.slow')
+def slow(seconds):
+    time.sleep(seconds)
+    # Так же поступил бы другой воркер, пока это задание выполняется.
+    calls.append(jobs.release_stale())
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+def test_jobs_run_by_priority():
+    jobs.enqueue(record, 'обычное')
+    jobs.enqueue(record, 'срочное', priority=5)
+    jobs.enqueue(record, 'отложенное', delay=60)
+    call_command('run_jobs', '--burst')
+    assert calls == ['срочное', 'обычное'], (
+        "Убедитесь, что воркер берёт задания по приоритету и не трогает "
+        "отложенные."
+    )
+    assert list(Job.objects.values_list('args', flat=True)) == [
+        ['отложенное']
+    ]
+
+
+@pytest.mark.django_db
+def test_failed_job_retried_then_kept(settings):
+    settings.JOB_RETRY_DELAY = 0
+    job = jobs.enqueue(broken)
+    call_command('run_jobs', '--burst')
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (Job.FAILED, 2), (
+        "Убедитесь, что упавшее задание повторяется до max_attempts "
+        "и затем остаётся со статусом failed."
+    )
+    assert 'сломано' in job.last_error
+
+
+@pytest.mark.django_db
+def test_queue_concurrency_limit(settings):
+    settings.JOB_QUEUES = {'default': 2}
+    for value in range(3):
+        jobs.enqueue(record, value)
+    assert jobs.claim('w1') and jobs.claim('w2')
+    assert jobs.claim('w3') is None, (
+        "Убедитесь, что в очереди выполняется не больше JOB_QUEUES[queue] "
+        "заданий одновременно."
+    )
+    assert sorted(Job.objects.filter(status=Job.RUNNING).values_list(
+        'slot', flat=True)) == [0, 1]
+
+
+@pytest.mark.django_db
+def test_password_reset_email_queued(client, user, mailoutbox):
+    user.email = 'reset@example.com'
+    user.save()
+    response = client.post(
+        '/auth/password_reset/', {'email': 'reset@example.com'}
+    )
+    assert response.status_code == 302
+    assert not mailoutbox, (
+        "Убедитесь, что письмо сброса пароля отправляется через очередь."
+    )
+    call_command('run_jobs', '--burst')
+    assert [message.to for message in mailoutbox] == [['reset@example.com']]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_long_job_not_released(settings):
+    settings.JOB_TIMEOUT = 1
+    settings.JOB_HEARTBEAT_INTERVAL = 0.1
+    jobs.enqueue(slow, 1.5)
+    call_command('run_jobs', '--burst')
+    assert calls == [0], (
+        "Убедитесь, что воркер продлевает выполняющееся задание и оно не "
+        "запускается второй раз после JOB_TIMEOUT."
+    )
+    assert not Job.objects.exists()
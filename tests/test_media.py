@@ -0,0 +1,83 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from blog import images
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_url():
+    return '/media/' + default_storage.save('clip.bin', ContentFile(CONTENT))
+
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+
+def test_media_served_with_immutable_cache(client, media_url):
+    response = client.get(media_url)
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+    assert response['Accept-Ranges'] == 'bytes'
+    assert 'immutable' in response['Cache-Control'], (
+        "Убедитесь, что файлы с именем по хэшу кэшируются как неизменяемые."
+    )
+    cached = client.get(media_url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert cached.status_code == 304
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-9', CONTENT[:10]),
+    ('bytes=1000-', CONTENT[1000:]),
+    ('bytes=-5', CONTENT[-5:]),
+    ('bytes=1020-5000', CONTENT[1020:]),
+])
+def test_media_range(client, media_url, header, expected):
+    response = client.get(media_url, HTTP_RANGE=header)
+    assert response.status_code == 206, (
+        "Убедитесь, что медиафайлы отдаются по заголовку Range."
+    )
+    assert body(response) == expected
+    assert int(response['Content-Length']) == len(expected)
+    assert response['Content-Range'].endswith(f'/{len(CONTENT)}')
+
+
+def test_media_range_edge_cases(client, media_url):
+    response = client.get(media_url, HTTP_RANGE='bytes=5000-')
+    assert response.status_code == 416
+    assert response['Content-Range'] == f'bytes */{len(CONTENT)}'
+    stale = client.get(
+        media_url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"other"'
+    )
+    assert stale.status_code == 200, (
+        "Убедитесь, что при несовпадении If-Range файл отдаётся целиком."
+    )
+    assert client.get('/media/missing.bin').status_code == 404
+
+
+def test_media_accel_redirect(client, media_url, settings):
+    settings.MEDIA_SENDFILE = 'x-accel-redirect'
+    response = client.get(media_url, HTTP_RANGE='bytes=0-9')
+    assert response.status_code == 200
+    assert response['X-Accel-Redirect'] == (
+        '/protected-media/' + media_url[len('/media/'):]
+    )
+    assert not response.content
+
+
+def test_ready_thumbnail_immutable(client, media_url):
+    name = media_url[len('/media/'):]
+    variant = images.variant_name(name, 320, 'webp')
+    images.thumbnail_storage.save_atomic(variant, b'RIFF')
+    response = client.get(images.thumbnail_storage.url(variant))
+    assert response.status_code == 200
+    assert 'immutable' in response['Cache-Control'], (
+        "Убедитесь, что готовые варианты картинок кэшируются как "
+        "неизменяемые."
+    )
+    legacy = images.variant_name('legacy.jpg', 320, 'webp')
+    images.thumbnail_storage.save_atomic(legacy, b'RIFF')
+    response = client.get(images.thumbnail_storage.url(legacy))
+    assert 'immutable' not in response['Cache-Control']
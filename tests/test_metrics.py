@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from core import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(metrics, 'registry', metrics.Registry())
+
+
+@pytest.mark.django_db
+def test_metrics_require_staff_or_token(client, admin_client, settings):
+    settings.METRICS_TOKEN = 'secret'
+    assert client.get('/metrics').status_code == 403, (
+        "Убедитесь, что метрики недоступны анонимному пользователю."
+    )
+    assert client.get(
+        '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+    ).status_code == 200, (
+        "Убедитесь, что метрики доступны по токену `METRICS_TOKEN`."
+    )
+    assert admin_client.get('/metrics').status_code == 200, (
+        "Убедитесь, что метрики доступны персоналу."
+    )
+
+
+@pytest.mark.django_db
+def test_metrics_count_cache_hits_per_route(client, admin_client):
+    client.get('/')
+    client.get('/')
+    body = admin_client.get('/metrics').content.decode()
+    for cache_status in ('miss', 'hit'):
+        sample = (
+            'blogicum_requests_total'
+            f'{{cache="{cache_status}",route="blog:index",status="200"}} 1'
+        )
+        assert sample in body, (
+            "Убедитесь, что /metrics считает ответы по маршруту, статусу "
+            "и попаданию в кэш страниц."
+        )
+    assert (
+        'blogicum_request_duration_seconds_count'
+        '{cache="hit",route="blog:index",status="200"} 1'
+    ) in body
+
+
+@pytest.mark.django_db
+def test_metrics_merge_worker_files(admin_client, settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    labels = [['route', 'pages:about']]
+    (tmp_path / '999999-1.json').write_text(json.dumps({
+        'counters': [['blogicum_db_queries_total', labels, 5]],
+        'histograms': [[
+            'blogicum_request_duration_seconds', labels,
+            [1] + [0] * (len(metrics.LATENCY_BUCKETS) - 1), 0.001, 1,
+        ]],
+    }))
+    metrics.registry.inc('blogicum_db_queries_total', dict(labels), 2)
+    body = admin_client.get('/metrics').content.decode()
+    assert 'blogicum_db_queries_total{route="pages:about"} 7' in body, (
+        "Убедитесь, что /metrics складывает метрики всех процессов."
+    )
+    assert (
+        'blogicum_request_duration_seconds_bucket'
+        '{route="pages:about",le="+Inf"} 1'
+    ) in body
+
+
+def _snapshot(value):
+    return json.dumps({
+        'counters': [[
+            'blogicum_db_queries_total', [['route', 'pages:about']], value
+        ]],
+        'histograms': [],
+    })
+
+
+@pytest.mark.django_db
+def test_metrics_archive_dead_workers(admin_client, settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    finished = subprocess.Popen([sys.executable, '-c', ''])
+    finished.wait()
+    (tmp_path / f'{finished.pid}-1.json').write_text(_snapshot(5))
+    # Прежний процесс с тем же pid, что у живого: его итоги не затираются.
+    (tmp_path / f'{os.getpid()}-1.json').write_text(_snapshot(3))
+    metrics.registry.inc('blogicum_db_queries_total', {'route': 'pages:about'})
+    sample = 'blogicum_db_queries_total{route="pages:about"} 9'
+    for _ in range(2):
+        assert sample in admin_client.get('/metrics').content.decode(), (
+            "Убедитесь, что итоги завершившихся процессов не теряются и не "
+            "учитываются дважды."
+        )
+    assert not (tmp_path / f'{finished.pid}-1.json').exists(), (
+        "Убедитесь, что снимки завершившихся процессов переносятся в архив."
+    )
+    assert (tmp_path / metrics.ARCHIVE_NAME).exists()
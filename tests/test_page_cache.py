@@ -0,0 +1,151 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def _get_anonymously(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(client, post_with_published_location):
+    post = post_with_published_location
+    urls = (
+        '/',
+        f'/posts/{post.id}/',
+        f'/category/{post.category.slug}/',
+        f'/profile/{post.author.username}/',
+    )
+    for url in urls:
+        first, _ = _get_anonymously(client, url)
+        second, n_queries = _get_anonymously(client, url)
+        assert n_queries == 0, (
+            f"Убедитесь, что страница `{url}` отдаётся анонимному посетителю"
+            " из кэша без запросов к базе данных."
+        )
+        assert first.content == second.content
+
+
+@pytest.mark.django_db
+def test_page_cache_invalidated_by_writes(
+        client, mixer, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    detail_url = f'/posts/{post.id}/'
+    client.get('/')
+    client.get(detail_url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        comment = mixer.blend(
+            'blog.Comment', post=post, text='Новый комментарий'
+        )
+    assert 'Новый комментарий' in client.get(detail_url).content.decode(), (
+        "Убедитесь, что новый комментарий сбрасывает кэш страницы поста."
+    )
+    assert '(1)' in client.get('/').content.decode(), (
+        "Убедитесь, что новый комментарий сбрасывает кэш ленты."
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.delete()
+        post.title = 'Изменённый заголовок'
+        post.save()
+    content = client.get('/').content.decode()
+    assert 'Изменённый заголовок' in content and '(0)' in content, (
+        "Убедитесь, что изменение поста сбрасывает кэш ленты."
+    )
+
+    post.category.is_published = False
+    with django_capture_on_commit_callbacks(execute=True):
+        post.category.save()
+    assert 'Изменённый заголовок' not in client.get('/').content.decode(), (
+        "Убедитесь, что изменение категории сбрасывает кэш страниц."
+    )
+
+
+@pytest.mark.django_db
+def test_page_cache_invalidated_after_commit(
+        mixer, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    from blog import cache
+
+    tags = [cache.FEED_TAG, cache.post_tag(post_with_published_location.id)]
+    versions = cache.get_tag_versions(tags)
+    with django_capture_on_commit_callbacks() as callbacks:
+        mixer.blend('blog.Comment', post=post_with_published_location)
+        post_with_published_location.save()
+    assert cache.get_tag_versions(tags) == versions, (
+        "Убедитесь, что версии тегов кэша меняются только после коммита "
+        "транзакции: иначе в кэш под новой версией попадёт старая страница."
+    )
+    for callback in callbacks:
+        callback()
+    assert all(
+        new != old
+        for new, old in zip(cache.get_tag_versions(tags), versions)
+    ), "Убедитесь, что после коммита версии тегов кэша меняются."
+
+
+@pytest.mark.django_db
+def test_post_cards_follow_post_version(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get('/')
+    post.title = 'Заголовок после правки'
+    post.save()
+    assert 'Заголовок после правки' in user_client.get('/').content.decode(), (
+        "Убедитесь, что карточка поста перерисовывается после его изменения."
+    )
+
+
+@pytest.mark.django_db
+def test_post_cards_follow_bulk_and_related_changes(
+        user_client, post_with_published_location
+):
+    from blog.models import Location, Post
+
+    post = post_with_published_location
+    user_client.get('/')
+    Post.objects.filter(pk=post.pk).update(title='Заголовок из update')
+    Location.objects.filter(pk=post.location_id).update(name='Новое место')
+    content = user_client.get('/').content.decode()
+    assert 'Заголовок из update' in content and 'Новое место' in content, (
+        "Убедитесь, что карточка поста перерисовывается после update() по "
+        "набору постов и после изменения связанных записей."
+    )
+
+
+@pytest.mark.django_db
+def test_post_card_srcset_follows_ready_variants(
+        user_client, mixer, user, published_category):
+    from io import BytesIO
+
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from PIL import Image
+
+    from blog import images
+
+    buffer = BytesIO()
+    Image.new('RGB', (800, 600), 'olive').save(buffer, 'JPEG')
+    name = default_storage.save('card.jpg', ContentFile(buffer.getvalue()))
+    mixer.blend(
+        'blog.Post', author=user, category=published_category, image=name,
+    )
+    ready_url = images.thumbnail_storage.url(
+        images.variant_name(name, 640, 'webp')
+    )
+    assert ready_url not in user_client.get('/').content.decode()
+    images.generate_variants(name)
+    assert ready_url in user_client.get('/').content.decode(), (
+        "Убедитесь, что карточка из кэша ссылается на варианты картинки, "
+        "созданные после её отрисовки."
+    )
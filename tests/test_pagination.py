@@ -0,0 +1,101 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from conftest import N_PER_PAGE
+
+
+def _get_cursor_page(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Убедитесь, что страница `{url}` с курсорной пагинацией"
+        " отображается без ошибок."
+    )
+    assert not any(
+        'COUNT(*)' in query['sql'].upper()
+        for query in queries.captured_queries
+    ), "Убедитесь, что курсорная пагинация не выполняет запрос COUNT(*)."
+    return response
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_cursor_pagination_walks_feed(
+        client, many_posts_with_published_locations
+):
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+    seen = []
+    url = '/'
+    pages = []
+    while url:
+        response = _get_cursor_page(client, url)
+        page_obj = response.context['page_obj']
+        assert len(page_obj) <= N_PER_PAGE
+        seen.extend(post.id for post in page_obj)
+        pages.append(response)
+        next_link = re.search(r'href="(\?after=[^"]+)"',
+                              response.content.decode())
+        url = '/' + next_link.group(1) if next_link else None
+    assert seen == [post.id for post in expected], (
+        "Убедитесь, что при переходе по ссылкам `?after=` посты выводятся"
+        " без пропусков и повторов в порядке убывания даты публикации."
+    )
+
+    last_page_content = pages[-1].content.decode()
+    previous_link = re.search(r'href="(\?before=[^"]+)"', last_page_content)
+    assert previous_link, (
+        "Убедитесь, что на последней странице ленты есть ссылка `?before=`."
+    )
+    response = _get_cursor_page(client, '/' + previous_link.group(1))
+    assert [post.id for post in response.context['page_obj']] == [
+        post.id for post in pages[-2].context['page_obj']
+    ], "Убедитесь, что ссылка `?before=` ведёт на предыдущую страницу."
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_cursor_pagination_rejects_broken_token(client):
+    response = client.get('/?after=not-a-cursor')
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что некорректный курсор страницы приводит к ошибке 404."
+    )
+
+
+@pytest.mark.django_db
+def test_elided_page_range_and_cached_count(
+        user_client, mixer, many_posts_with_published_locations,
+        django_capture_on_commit_callbacks
+):
+    from blog.models import Post
+    from blog.paginators import CachedCountPaginator
+
+    queryset = Post.objects.order_by('-pub_date')
+    CachedCountPaginator(queryset, 1).count
+    with CaptureQueriesContext(connection) as queries:
+        paginator = CachedCountPaginator(queryset, 1)
+        assert paginator.num_pages == len(many_posts_with_published_locations)
+    assert not queries.captured_queries, (
+        "Убедитесь, что число объектов пагинатора берётся из кэша."
+    )
+    page_range = list(paginator.get_elided_page_range(10))
+    assert paginator.ELLIPSIS in page_range and len(page_range) < 15
+
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend('blog.Post', author=many_posts_with_published_locations[0]
+                    .author)
+    assert CachedCountPaginator(queryset, 1).count == len(
+        many_posts_with_published_locations
+    ) + 1, "Убедитесь, что новый пост сбрасывает кэш числа объектов."
+
+    response = user_client.get('/?page=2')
+    assert len(list(response.context['page_range'])) <= 9, (
+        "Убедитесь, что пагинатор ленты выводит сокращённый список страниц."
+    )
@@ -0,0 +1,55 @@
+import pytest
+
+# Два первых запроса каждого ответа загружают сессию и пользователя.
+SESSION_QUERIES = 2
+
+
+@pytest.fixture
+def own_comment(mixer, user, post_with_published_location):
+    return mixer.blend(
+        'blog.Comment', post=post_with_published_location, author=user
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('url', 'expected_queries'),
+    [
+        # Время изменения для ETag (при первом запросе), пост со
+        # связанными строками и комментарии с авторами.
+        ('/posts/{post.id}/', 3),
+        # Пост, а также местоположения и категории для формы.
+        ('/posts/{post.id}/edit/', 3),
+        # Пост и выбранное местоположение в форме подтверждения.
+        ('/posts/{post.id}/delete/', 2),
+        ('/posts/{post.id}/edit_comment/{comment.id}/', 1),
+        ('/posts/{post.id}/delete_comment/{comment.id}/', 1),
+    ],
+    ids=['post_detail', 'edit_post', 'delete_post', 'edit_comment',
+         'delete_comment'],
+)
+def test_object_fetched_once(
+        user_client, django_assert_num_queries, post_with_published_location,
+        own_comment, url, expected_queries
+):
+    url = url.format(post=post_with_published_location, comment=own_comment)
+    with django_assert_num_queries(SESSION_QUERIES + expected_queries):
+        response = user_client.get(url)
+    assert response.status_code == 200, (
+        f"Убедитесь, что страница `{url}` отображается автору без ошибок."
+    )
+
+
+@pytest.mark.django_db
+def test_add_comment_does_not_load_post(
+        user_client, django_assert_num_queries, post_with_published_location
+):
+    post = post_with_published_location
+    # Проверка существования поста, сессия и пользователь, затем в одной
+    # транзакции: вставка, счётчик, теги кэша, поисковый индекс
+    # (с SAVEPOINT и RELEASE).
+    with django_assert_num_queries(1 + SESSION_QUERIES + 6):
+        response = user_client.post(
+            f'/posts/{post.id}/comment/', {'text': 'Комментарий'}
+        )
+    assert response.status_code == 302
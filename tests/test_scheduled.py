@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_scheduled_post_published_by_command(
+        client, mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    assert not post.is_visible, (
+        "Убедитесь, что отложенный пост не виден до времени публикации."
+    )
+    assert post not in client.get('/').context['page_obj']
+
+    # Время публикации наступило; save() не вызывается, как и в жизни.
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    call_command('publish_scheduled')
+    assert Post.objects.get(pk=post.pk).is_visible, (
+        "Убедитесь, что команда `publish_scheduled` открывает посты, время "
+        "публикации которых наступило."
+    )
+    assert post in client.get('/').context['page_obj'], (
+        "Убедитесь, что команда `publish_scheduled` сбрасывает кэш ленты."
+    )
+
+
+@pytest.mark.django_db
+def test_refresh_visibility_hides_unpublished(mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+    )
+    Post.objects.filter(pk=post.pk).update(is_published=False)
+    assert Post.objects.refresh_visibility() == 1
+    assert not Post.objects.get(pk=post.pk).is_visible
+
+
+@pytest.mark.django_db
+def test_category_toggle_recomputes_visibility(
+        mixer, user, published_category):
+    posts = mixer.cycle(3).blend(
+        'blog.Post', author=user, category=published_category,
+    )
+    published_category.is_published = False
+    published_category.save()
+    assert not Post.objects.filter(pk__in=[post.pk for post in posts],
+                                   is_visible=True).exists(), (
+        "Убедитесь, что снятие категории с публикации скрывает её посты."
+    )
+    published_category.is_published = True
+    published_category.save()
+    assert Post.objects.visible().count() == 3, (
+        "Убедитесь, что публикация категории снова открывает её посты."
+    )
@@ -0,0 +1,136 @@
+import pytest
+from django.urls import reverse
+
+from blog.models import Comment, Post
+
+
+@pytest.fixture
+def searchable_posts(mixer, user, published_category):
+    def blend(title, text, **kwargs):
+        return mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            title=title, text=text, **kwargs
+        )
+    return {
+        'title': blend('Поездка в горы', 'Было холодно.'),
+        'text': blend('Выходные', 'Мы снова уехали в горы <b>налегке</b>.'),
+        'hidden': blend('Горы зимой', 'Черновик.', is_published=False),
+        'other': blend('Город', 'Кофе и музеи.'),
+    }
+
+
+def search(client, query, **params):
+    response = client.get(reverse('blog:search'), {'q': query, **params})
+    assert response.status_code == 200, (
+        "Убедитесь, что страница поиска отвечает без ошибок."
+    )
+    return response.context
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_highlights(client, searchable_posts):
+    hits = search(client, 'горы')['hits']
+    found = [hit.post_id for hit in hits]
+    assert found == [
+        searchable_posts['title'].id, searchable_posts['text'].id
+    ], (
+        "Убедитесь, что поиск находит только опубликованные посты и ставит "
+        "совпадение в заголовке выше совпадения в тексте."
+    )
+    assert '<mark>горы</mark>' in hits[1].snippet, (
+        "Убедитесь, что найденные слова подсвечены в выдаче."
+    )
+    assert '&lt;b&gt;' in hits[1].snippet, (
+        "Убедитесь, что текст поста в выдаче экранируется."
+    )
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(client, user, searchable_posts):
+    post = searchable_posts['other']
+    comment = Comment.objects.create(
+        post=post, author=user, text='Отличный маршрут через перевал'
+    )
+    hits = search(client, 'перевал')['hits']
+    assert [(hit.kind, hit.post_id) for hit in hits] == [
+        ('comment', post.id)
+    ], "Убедитесь, что комментарии попадают в поисковый индекс."
+
+    comment.delete()
+    post.title = 'Перевал'
+    post.save()
+    hits = search(client, 'перевал')['hits']
+    assert [(hit.kind, hit.object_id) for hit in hits] == [
+        ('post', post.id)
+    ], (
+        "Убедитесь, что индекс обновляется при изменении и удалении "
+        "постов и комментариев."
+    )
+    Post.objects.get(pk=post.pk).delete()
+    assert not search(client, 'перевал')['hits']
+
+
+@pytest.mark.django_db
+def test_search_cursor_pagination(client, mixer, user, published_category):
+    mixer.cycle(25).blend(
+        'blog.Post', author=user, category=published_category,
+        title='Заметка', text=mixer.sequence(
+            lambda number: 'маяк ' * (number % 4 + 1)
+        ),
+    )
+    seen = []
+    context = search(client, 'маяк')
+    while True:
+        seen += [hit.post_id for hit in context['hits']]
+        if not context['next_cursor']:
+            break
+        context = search(client, 'маяк', after=context['next_cursor'])
+    assert len(seen) == 25 and len(set(seen)) == 25, (
+        "Убедитесь, что курсорная пагинация поиска проходит по всем "
+        "результатам без повторов."
+    )
+
+
+@pytest.mark.django_db
+def test_admin_search_uses_index(admin_client, searchable_posts):
+    response = admin_client.get(
+        reverse('admin:blog_post_changelist'), {'q': 'налегке'}
+    )
+    assert list(response.context['cl'].result_list) == [
+        searchable_posts['text']
+    ], "Убедитесь, что поиск в админке ищет и по тексту поста."
+
+
+@pytest.mark.parametrize('after', [None, [-0.5, 42]])
+def test_postgres_search_sql(after):
+    from blog.search import PostgresSearchBackend
+
+    backend = PostgresSearchBackend()
+    sql, params = backend.search_sql(['горы', 'зимой'], after, 11)
+    assert '{' not in sql and 'blog_post p' in sql and 'blog_comment cm' in sql
+    assert sql.count('%s') == len(params), (
+        "Убедитесь, что число параметров совпадает с числом мест под них."
+    )
+    assert params.count('горы:* & зимой:*') == 2 and params[-1] == 11
+    if after:
+        assert params[-4:-1] == [-0.5, -0.5, 42]
+
+    sql, params = backend.post_ids_sql(['горы'], 500)
+    assert sql.count('%s') == len(params) and params == ['горы:*', 500]
+
+
+@pytest.mark.django_db
+def test_postgres_search_runs(searchable_posts):
+    from django.db import connection
+
+    from blog.search import PostgresSearchBackend
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('Поиск по tsvector работает только в PostgreSQL.')
+    hits, has_next = PostgresSearchBackend().search('горы')
+    assert {hit.post_id for hit in hits} == {
+        searchable_posts['title'].id, searchable_posts['text'].id
+    } and not has_next
+    assert PostgresSearchBackend().post_ids('налегке') == [
+        searchable_posts['text'].id
+    ]
@@ -0,0 +1,49 @@
+import gzip
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path / 'static'
+    settings.STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return staticfiles_storage.stored_name('css/bootstrap.min.css')
+
+
+def test_collectstatic_writes_hashed_gzip(collected):
+    assert collected != 'css/bootstrap.min.css', (
+        "Убедитесь, что collectstatic добавляет хэш содержимого в имена."
+    )
+    with staticfiles_storage.open(collected) as original, \
+            staticfiles_storage.open(collected + '.gz') as compressed:
+        assert gzip.decompress(compressed.read()) == original.read()
+    assert not staticfiles_storage.exists(
+        staticfiles_storage.stored_name('img/logo.png') + '.gz'
+    ), "Убедитесь, что уже сжатые форматы не сжимаются повторно."
+
+
+@pytest.mark.django_db
+def test_precompressed_static_served(collected):
+    # Middleware читает манифест при создании, клиент нужен новый.
+    client = Client()
+    url = f'/static/{collected}'
+    response = client.get(url, HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip', (
+        "Убедитесь, что статика отдаётся сжатой копией по Accept-Encoding."
+    )
+    assert response['Content-Type'].startswith('text/css')
+    assert 'immutable' in response['Cache-Control']
+    assert 'Accept-Encoding' in response['Vary']
+
+    plain = client.get(url)
+    assert not plain.has_header('Content-Encoding')
+    assert b''.join(plain.streaming_content) == gzip.decompress(
+        b''.join(response.streaming_content)
+    )
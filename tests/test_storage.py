@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from blog.models import Post
+from core.models import Job
+from core.storage import is_content_name
+
+CONTENT = b'GIF89a\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00;'
+
+
+@pytest.mark.django_db
+def test_identical_uploads_share_file(
+        mixer, user, published_category, django_capture_on_commit_callbacks,
+        settings):
+    settings.CONTENT_STORAGE_GRACE_SECONDS = 0
+    first = default_storage.save('first.GIF', ContentFile(CONTENT))
+    second = default_storage.save('second.gif', ContentFile(CONTENT))
+    assert first == second, (
+        "Убедитесь, что одинаковое содержимое хранится одним файлом."
+    )
+    assert is_content_name(first) and first.endswith('.gif')
+    shard, subshard, file_name = first.split('/')
+    assert shard + subshard == file_name[:4]
+
+    posts = mixer.cycle(2).blend(
+        'blog.Post', author=user, category=published_category, image=first,
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        posts[0].delete()
+    assert default_storage.exists(first), (
+        "Убедитесь, что файл, на который ещё ссылаются, не удаляется."
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        posts[1].delete()
+    assert not default_storage.exists(first), (
+        "Убедитесь, что файл без ссылок удаляется вместе с постом."
+    )
+
+
+@pytest.mark.django_db
+def test_migrate_media_storage(mixer, user, published_category, settings):
+    settings.MEDIA_ROOT.mkdir(parents=True)
+    for name in ('old.gif', 'copy.gif'):
+        (settings.MEDIA_ROOT / name).write_bytes(CONTENT)
+    posts = [
+        mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=name,
+        )
+        for name in ('old.gif', 'copy.gif', 'old.gif')
+    ]
+    call_command('migrate_media_storage')
+    names = {Post.objects.get(pk=post.pk).image.name for post in posts}
+    assert len(names) == 1 and is_content_name(names.pop()), (
+        "Убедитесь, что команда `migrate_media_storage` переносит файлы "
+        "в хранилище по хэшу и сливает одинаковые."
+    )
+    assert not (settings.MEDIA_ROOT / 'old.gif').exists()
+    assert not (settings.MEDIA_ROOT / 'copy.gif').exists()
+
+
+@pytest.mark.django_db
+def test_reupload_protects_file_from_release(
+        mixer, user, published_category, django_capture_on_commit_callbacks):
+    name = default_storage.save('photo.gif', ContentFile(CONTENT))
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category, image=name,
+    )
+    # Файл давно лежит на диске.
+    os.utime(default_storage.path(name), (0, 0))
+    # Та же картинка загружается для поста, который ещё не сохранён.
+    assert default_storage.save('again.gif', ContentFile(CONTENT)) == name
+    with django_capture_on_commit_callbacks(execute=True):
+        post.delete()
+    assert default_storage.exists(name), (
+        "Убедитесь, что повторно загруженный файл не удаляется, пока "
+        "ссылка на него может быть не закоммичена."
+    )
+    assert Job.objects.filter(
+        task='blog.tasks.release_image', args=[name]
+    ).exists(), "Убедитесь, что проверка откладывается, а не забывается."
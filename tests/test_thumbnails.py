@@ -0,0 +1,98 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from blog import images
+
+
+@pytest.fixture
+def image_name():
+    buffer = BytesIO()
+    Image.new('RGB', (1600, 1200), 'navy').save(buffer, 'JPEG')
+    name = default_storage.save('thumbs_test.jpg', ContentFile(
+        buffer.getvalue()
+    ))
+    yield name
+    default_storage.delete(name)
+
+
+@pytest.mark.django_db
+def test_variants_generated_on_save(
+        client, mixer, user, published_category, image_name,
+        django_capture_on_commit_callbacks, settings):
+    settings.CONTENT_STORAGE_GRACE_SECONDS = 0
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=image_name,
+    )
+    call_command('run_jobs', '--burst')
+    for width in images.THUMBNAIL_WIDTHS:
+        for fmt in images.THUMBNAIL_FORMATS:
+            variant = images.variant_name(image_name, width, fmt)
+            assert images.thumbnail_storage.exists(variant), (
+                "Убедитесь, что сохранение поста ставит в очередь создание "
+                "уменьшенных вариантов картинки."
+            )
+    with Image.open(images.thumbnail_storage.path(
+            images.variant_name(image_name, 320, 'webp'))) as variant:
+        assert variant.size == (320, 240)
+
+    ready_url = images.thumbnail_storage.url(
+        images.variant_name(image_name, 640, 'webp')
+    )
+    content = client.get('/').content.decode()
+    assert ready_url in content, (
+        "Убедитесь, что лента ссылается на уменьшенные варианты картинки."
+    )
+    response = client.get(ready_url)
+    assert response.status_code == 200, (
+        "Убедитесь, что адреса готовых вариантов из srcset открываются."
+    )
+    assert response['Content-Type'] == 'image/webp'
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.delete()
+    assert not images.thumbnail_storage.exists(image_name), (
+        "Убедитесь, что варианты удаляются вместе с постом."
+    )
+
+
+@pytest.mark.django_db
+def test_missing_variant_generated_on_request(
+        client, mixer, user, published_category, image_name):
+    assert client.get(f'/thumbs/960/jpeg/{image_name}').status_code == 404, (
+        "Убедитесь, что варианты создаются только для картинок постов."
+    )
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=image_name,
+    )
+    response = client.get(f'/thumbs/960/jpeg/{image_name}')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'image/jpeg'
+    assert 'immutable' in response['Cache-Control']
+    assert images.thumbnail_storage.exists(
+        images.variant_name(image_name, 960, 'jpeg')
+    )
+
+    assert client.get(f'/thumbs/961/jpeg/{image_name}').status_code == 404
+    assert client.get('/thumbs/960/jpeg/missing.jpg').status_code == 404
+
+
+@pytest.mark.django_db
+def test_decompression_bomb_not_decoded(
+        client, mixer, user, published_category, image_name, monkeypatch):
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=image_name,
+    )
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 1000)
+    response = client.get(f'/thumbs/320/webp/{image_name}')
+    assert response.status_code == 404, (
+        "Убедитесь, что слишком большая картинка не приводит к ошибке "
+        "сервера."
+    )
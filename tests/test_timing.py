@@ -0,0 +1,60 @@
+import json
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SERVER_TIMING_RE = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+@pytest.mark.django_db
+def test_server_timing_header(
+        client, admin_client, settings, post_with_published_location):
+    url = f'/posts/{post_with_published_location.id}/'
+    assert 'Server-Timing' not in client.get(url), (
+        "Убедитесь, что заголовок `Server-Timing` не отдаётся посторонним."
+    )
+    with CaptureQueriesContext(connection) as captured:
+        response = admin_client.get(url)
+    metrics = {
+        name: (float(duration), queries)
+        for name, duration, queries in SERVER_TIMING_RE.findall(
+            response['Server-Timing']
+        )
+    }
+    assert set(metrics) == {'total', 'view', 'db', 'tpl'}, (
+        "Убедитесь, что ответ содержит заголовок `Server-Timing` со временем "
+        "ответа, представления, SQL и шаблонов."
+    )
+    assert metrics['db'][1] == str(len(captured)), (
+        "Убедитесь, что в `Server-Timing` указано число SQL-запросов."
+    )
+    assert metrics['tpl'][0] > 0
+
+    settings.REQUEST_TIMING_HEADER = True
+    assert 'Server-Timing' in client.get(url), (
+        "Убедитесь, что REQUEST_TIMING_HEADER включает `Server-Timing` для "
+        "всех клиентов."
+    )
+
+
+@pytest.mark.django_db
+def test_slow_request_logged(client, settings, caplog):
+    settings.REQUEST_TIMING_SLOW_MS = 0
+    settings.REQUEST_TIMING_LOG_SAMPLE_RATE = 0
+    # Логгер не передаёт записи корневому, подключаем caplog напрямую.
+    logger = logging.getLogger('core.timing')
+    logger.addHandler(caplog.handler)
+    try:
+        client.get('/')
+    finally:
+        logger.removeHandler(caplog.handler)
+    record, = [r for r in caplog.records if r.name == 'core.timing']
+    line = json.loads(record.getMessage())
+    assert line['route'] == 'blog:index' and line['status'] == 200, (
+        "Убедитесь, что медленные запросы попадают в журнал с маршрутом и "
+        "статусом ответа."
+    )
+    assert line['bytes'] > 0